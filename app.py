@@ -8,6 +8,7 @@ Includes WebSocket support for real-time streaming.
 import eventlet
 eventlet.monkey_patch()
 
+import atexit
 import os
 import sys
 import json
@@ -91,7 +92,8 @@ _streaming_lock = Lock()
 # Global instances (protected by locks)
 engine = None
 live_generator = LiveDataGenerator(anomaly_rate=0.40)  # 40% of transactions have quality issues
-log_storage = LiveLogStorage(log_file="live_stream_logs.json")
+log_storage = LiveLogStorage(log_file="live_stream_logs.jsonl")
+atexit.register(log_storage.close)  # fsync queued logs on shutdown
 
 # Streaming state (protected by _streaming_lock)
 streaming_active = False
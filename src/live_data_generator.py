@@ -4,14 +4,382 @@ Live Data Generator for Real-Time Streaming
 Generates realistic VISA transaction data matching the expected schema.
 Can be configured with an external API key for production use.
 """
+import glob
+import gzip
+import itertools
+import math
+import mmap
+import queue
 import random
+import re
+import shutil
 import string
-import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional
 import json
 import os
 
+import numpy as np
+import pandas as pd
+
+from .config import Action
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            obj,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(obj, default=str).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Per-thread Random instances, so generate_stream() workers do not all
+# contend on the lock of the shared module-level generator
+_tls = threading.local()
+
+
+def _thread_rng() -> random.Random:
+    """Return this thread's Random instance, seeding it on first use."""
+    rng = getattr(_tls, "rng", None)
+    if rng is None:
+        rng = _tls.rng = random.Random(os.urandom(16))
+    return rng
+
+
+# "YYYY-MM-DDTHH:MM:SS" by epoch second, so each second is formatted once
+_iso_prefixes = {}
+
+
+def _now_iso(seconds_ago: int = 0) -> str:
+    """
+    Current UTC time (minus seconds_ago) as ISO-8601 with microseconds and
+    a Z suffix, e.g. 2024-01-31T12:00:00.123456Z.
+    
+    Same text as datetime.utcnow().isoformat(timespec="microseconds") + "Z",
+    without creating a datetime; the date/time part is cached per second.
+    """
+    second, nanos = divmod(time.time_ns(), 1_000_000_000)
+    second -= seconds_ago
+    prefix = _iso_prefixes.get(second)
+    if prefix is None:
+        if len(_iso_prefixes) >= 64:
+            _iso_prefixes.clear()
+        prefix = _iso_prefixes[second] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+    return f"{prefix}.{nanos // 1000:06d}Z"
+
+
+# (UTC epoch day, (clearing date, settlement date)) for _settlement_dates
+_settlement_dates_cache = (None, ("", ""))
+
+
+def _settlement_dates() -> tuple:
+    """
+    (clearing_date, settlement_date) for a transaction made now: the UTC
+    date plus one and two days, as YYYY-MM-DD. Recomputed once per day.
+    """
+    global _settlement_dates_cache
+    day = time.time_ns() // 86_400_000_000_000
+    cached_day, dates = _settlement_dates_cache
+    if day != cached_day:
+        today = date(1970, 1, 1) + timedelta(days=day)
+        dates = ((today + timedelta(days=1)).isoformat(), (today + timedelta(days=2)).isoformat())
+        _settlement_dates_cache = (day, dates)
+    return dates
+
+
+# Low-cardinality columns stored as dictionary-encoded categoricals
+# (small integer codes plus one copy of each distinct string)
+_CATEGORICAL_COLUMNS = (
+    "txn_type", "txn_currency", "txn_status", "txn_response_code",
+    "card_network", "card_bin", "card_expiry_month", "card_expiry_year",
+    "card_card_type", "card_funding_source", "card_issuer_bank",
+    "merchant_merchant_name", "merchant_merchant_category_code", "merchant_country",
+    "merchant_acquirer_bank",
+    "customer_billing_address_city", "customer_billing_address_state",
+    "customer_billing_address_country", "customer_billing_address_postal_code",
+    "customer_shipping_address_city", "customer_shipping_address_state",
+    "customer_shipping_address_country", "customer_shipping_address_postal_code",
+    "customer_user_agent",
+    "fraud_risk_level", "fraud_velocity_check", "fraud_geo_check",
+    "authentication_three_ds_version", "authentication_eci",
+    "authentication_authentication_result",
+    "network_routing_region", "network_interchange_category",
+    "settlement_clearing_date", "settlement_settlement_date",
+    "compliance_psd2_exemption", "compliance_aml_screening",
+)
+
+# Chance of each anomaly-only flag (high value, declined, foreign, velocity
+# fail, geo fail) as a threshold on a uniform 16-bit lane
+_FLAG_THRESHOLDS = np.array(
+    [round(p * 65536) for p in (0.5, 0.3, 0.4, 0.4, 0.3)], dtype=np.uint16
+)[:, None]
+
+# Amount buckets (small / medium / large) used for normal transactions
+_AMOUNT_LOW = np.array([100, 1000, 5000])
+_AMOUNT_HIGH = np.array([1000, 5000, 20000])
+
+
+def _derive_numeric_columns(rng: np.random.Generator, is_anomaly: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized amount, status, risk and settlement fields for a batch.
+    
+    Each branch of the simulated transaction (high-value amounts, declines,
+    risk level, failed checks) is evaluated as a single NumPy pass over the
+    whole batch. Used by generate_batch() and, one block at a time, by the
+    per-transaction path.
+    """
+    n = len(is_anomaly)
+    
+    # All five coin flips from one raw draw: each 64-bit word is split into
+    # four 16-bit lanes, one lane per (flag, row), compared branch-free
+    flag_count = len(_FLAG_THRESHOLDS)
+    words = rng.bit_generator.random_raw(-(-flag_count * n // 4))
+    lanes = words.view(np.uint16)[:flag_count * n].reshape(flag_count, n)
+    high_value, declined, foreign, velocity_fail, geo_fail = is_anomaly & (lanes < _FLAG_THRESHOLDS)
+    
+    # Amount - higher for anomalies
+    bucket = rng.integers(0, 3, n)
+    amount = rng.integers(_AMOUNT_LOW[bucket], _AMOUNT_HIGH[bucket] + 1)
+    amount[high_value] = rng.integers(50000, 500001, int(high_value.sum()))
+    
+    # Status
+    status = np.where(declined, rng.choice(["declined", "failed", "pending"], n), "approved")
+    response_code = np.where(declined, rng.choice(["05", "51", "14", "54"], n), "00")
+    
+    # Risk score
+    risk_score = np.where(is_anomaly, rng.integers(60, 100, n), rng.integers(5, 41, n))
+    risk_level = np.where(is_anomaly, np.where(risk_score > 80, "high", "medium"), "low")
+    
+    # Settlement (int() truncation, as in the per-transaction path)
+    interchange_fee = (amount * 0.008).astype(np.int64)
+    gateway_fee = (amount * 0.003).astype(np.int64)
+    
+    return {
+        "amount": amount,
+        "status": status.astype(object),
+        "response_code": response_code.astype(object),
+        "foreign": foreign,
+        "risk_score": risk_score,
+        "risk_level": risk_level.astype(object),
+        "velocity_check": np.where(velocity_fail, "fail", "pass").astype(object),
+        "geo_check": np.where(geo_fail, "fail", "pass").astype(object),
+        "interchange_fee": interchange_fee,
+        "gateway_fee": gateway_fee,
+        "net_amount": amount - (amount * 0.011).astype(np.int64),
+    }
+
+
+# Pre-generated CAVV strings per generator (a 12-bit index picks one)
+_CAVV_POOL_SIZE = 4096
+
+# Distinct (url, headers) API responses kept by LiveDataGenerator
+_API_CACHE_SIZE = 128
+
+# Rows of numeric fields prefetched per thread for the per-transaction path
+_NUMERIC_BLOCK_SIZE = 256
+_NUMERIC_FIELDS = (
+    "amount", "status", "response_code", "foreign", "risk_score", "risk_level",
+    "velocity_check", "geo_check", "interchange_fee", "gateway_fee", "net_amount",
+)
+
+
+def _next_numeric_row(blocks: threading.local, anomaly_rate: float) -> tuple:
+    """
+    Return (is_anomaly, amount, status, ...) for one transaction.
+    
+    Rows are produced _NUMERIC_BLOCK_SIZE at a time by
+    _derive_numeric_columns and handed out one by one, so the branchy
+    scalar draws run as a handful of NumPy passes per block. Blocks live
+    in `blocks`, the calling generator's own thread-local, so generators
+    with different anomaly rates on one thread do not evict each other;
+    a block is discarded only when its generator's rate changes.
+    """
+    rows = getattr(blocks, "rows", None)
+    if not rows or blocks.rate != anomaly_rate:
+        np_rng = getattr(_tls, "np_rng", None)
+        if np_rng is None:
+            np_rng = _tls.np_rng = np.random.default_rng()
+        is_anomaly = np_rng.random(_NUMERIC_BLOCK_SIZE) < anomaly_rate
+        num = _derive_numeric_columns(np_rng, is_anomaly)
+        # tolist() turns NumPy scalars back into plain Python values
+        rows = blocks.rows = list(zip(
+            is_anomaly.tolist(), *(num[field].tolist() for field in _NUMERIC_FIELDS)
+        ))
+        blocks.rate = anomaly_rate
+    return rows.pop()
+
+
+# Flat DQS columns as (section path, ((column, field, default), ...)) groups,
+# in output column order. Missing or falsy values become the default, except
+# in _FLAT_KEEP_FALSY columns, where only a missing field does.
+_FLAT_SPEC = (
+    (("transaction",), (
+        ("txn_transaction_id", "transaction_id", ""),
+        ("txn_merchant_order_id", "merchant_order_id", ""),
+        ("txn_type", "type", ""),
+        ("txn_amount", "amount", 0),
+        ("txn_currency", "currency", "INR"),
+        ("txn_timestamp", "timestamp", ""),
+        ("txn_status", "status", ""),
+        ("txn_response_code", "response_code", ""),
+        ("txn_authorization_code", "authorization_code", ""),
+    )),
+    (("card",), (
+        ("card_network", "network", ""),
+        ("card_pan_token", "pan_token", ""),
+        ("card_bin", "bin", ""),
+        ("card_last4", "last4", ""),
+        ("card_expiry_month", "expiry_month", ""),
+        ("card_expiry_year", "expiry_year", ""),
+        ("card_card_type", "card_type", ""),
+        ("card_funding_source", "funding_source", ""),
+        ("card_issuer_bank", "issuer_bank", ""),
+    )),
+    (("merchant",), (
+        ("merchant_merchant_id", "merchant_id", ""),
+        ("merchant_terminal_id", "terminal_id", ""),
+        ("merchant_merchant_name", "merchant_name", ""),
+        ("merchant_merchant_category_code", "merchant_category_code", ""),
+        ("merchant_country", "country", ""),
+        ("merchant_acquirer_bank", "acquirer_bank", ""),
+        ("merchant_settlement_account", "settlement_account", ""),
+    )),
+    (("customer",), (
+        ("customer_customer_id", "customer_id", ""),
+        ("customer_email", "email", ""),
+        ("customer_phone", "phone", ""),
+    )),
+    (("customer", "billing_address"), (
+        ("customer_billing_address_city", "city", ""),
+        ("customer_billing_address_state", "state", ""),
+        ("customer_billing_address_country", "country", ""),
+        ("customer_billing_address_postal_code", "postal_code", ""),
+    )),
+    (("customer", "shipping_address"), (
+        ("customer_shipping_address_city", "city", ""),
+        ("customer_shipping_address_state", "state", ""),
+        ("customer_shipping_address_country", "country", ""),
+        ("customer_shipping_address_postal_code", "postal_code", ""),
+    )),
+    (("customer",), (
+        ("customer_ip_address", "ip_address", ""),
+        ("customer_device_fingerprint", "device_fingerprint", ""),
+        ("customer_user_agent", "user_agent", ""),
+    )),
+    (("fraud",), (
+        ("fraud_risk_score", "risk_score", 0),
+        ("fraud_risk_level", "risk_level", ""),
+        ("fraud_velocity_check", "velocity_check", ""),
+        ("fraud_geo_check", "geo_check", ""),
+    )),
+    (("authentication",), (
+        ("authentication_three_ds_version", "three_ds_version", ""),
+        ("authentication_eci", "eci", ""),
+        ("authentication_cavv", "cavv", ""),
+        ("authentication_ds_transaction_id", "ds_transaction_id", ""),
+        ("authentication_authentication_result", "authentication_result", ""),
+    )),
+    (("network",), (
+        ("network_network_transaction_id", "network_transaction_id", ""),
+        ("network_acquirer_reference_number", "acquirer_reference_number", ""),
+        ("network_routing_region", "routing_region", ""),
+        ("network_interchange_category", "interchange_category", ""),
+    )),
+    (("settlement",), (
+        ("settlement_settlement_batch_id", "settlement_batch_id", ""),
+        ("settlement_clearing_date", "clearing_date", ""),
+        ("settlement_settlement_date", "settlement_date", ""),
+        ("settlement_gross_amount", "gross_amount", 0),
+        ("settlement_interchange_fee", "interchange_fee", 0),
+        ("settlement_gateway_fee", "gateway_fee", 0),
+        ("settlement_net_amount", "net_amount", 0),
+    )),
+    (("compliance",), (
+        ("compliance_sca_applied", "sca_applied", False),
+        ("compliance_psd2_exemption", "psd2_exemption", ""),
+        ("compliance_aml_screening", "aml_screening", ""),
+    )),
+)
+
+_FLAT_KEEP_FALSY = frozenset({"compliance_sca_applied"})
+
+
+def _compile_flattener():
+    """
+    Generate the direct-subscript flattener for complete transactions.
+    
+    _FLAT_SPEC is fixed, so it is unrolled once at import into a function
+    that binds each section to a local and returns a single dict literal,
+    e.g. {'txn_amount': s0['amount'] or 0, ...}. A missing key raises
+    KeyError (TypeError for a None section) for the caller to handle;
+    _FLAT_KEEP_FALSY columns use .get(field, default) instead.
+    """
+    names = {}
+    lines = ["def _flatten_complete(transaction):"]
+    for path, _ in _FLAT_SPEC:
+        if path not in names:
+            names[path] = f"s{len(names)}"
+            parent = names.get(path[:-1], "transaction")
+            lines.append(f"    {names[path]} = {parent}[{path[-1]!r}]")
+    lines.append("    return {")
+    for path, fields in _FLAT_SPEC:
+        for key, field, default in fields:
+            if key in _FLAT_KEEP_FALSY:
+                lines.append(f"        {key!r}: {names[path]}.get({field!r}, {default!r}),")
+            else:
+                lines.append(f"        {key!r}: {names[path]}[{field!r}] or {default!r},")
+    lines.append("    }")
+    namespace = {}
+    exec(compile("\n".join(lines), "<flatten_for_dqs>", "exec"), namespace)
+    return namespace["_flatten_complete"]
+
+
+_flatten_complete = _compile_flattener()
+
+
+def _flatten_tolerant(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a transaction that may lack sections or fields, per _FLAT_SPEC."""
+    flat = {}
+    for path, fields in _FLAT_SPEC:
+        section = transaction
+        for part in path:
+            section = section.get(part) or {}
+        get = section.get
+        for key, field, default in fields:
+            flat[key] = get(field, default) if key in _FLAT_KEEP_FALSY else get(field) or default
+    return flat
+
 
 class LiveDataGenerator:
     """
@@ -59,22 +427,75 @@ class LiveDataGenerator:
     
     HIGH_RISK_COUNTRIES = ["NG", "RU", "KP", "AF", "PK"]
     
-    def __init__(self, api_key: Optional[str] = None, anomaly_rate: float = 0.15):
+    def __init__(self, api_key: Optional[str] = None, anomaly_rate: float = 0.15,
+                 workers: int = 1):
         """
         Initialize the generator.
         
         Args:
             api_key: Optional API key for external data source
             anomaly_rate: Rate of anomalous transactions (0.0 - 1.0)
+            workers: Threads used by generate_stream() (1 = generate inline)
         """
         self.api_key = api_key
         self.api_url = None  # External API URL for real data
         self.api_headers = {}  # Custom headers for API requests
+        # One session for every API call, so the connection is kept alive
+        self._session = self._make_session() if REQUESTS_AVAILABLE else None
+        # Recent API responses by (url, headers), reused for cache_ttl seconds
+        self.cache_ttl = 1.0
+        self._api_cache = OrderedDict()
+        self._api_cache_lock = threading.Lock()
         self.anomaly_rate = anomaly_rate
-        self.transaction_count = 0
+        self.transaction_count = 0  # Latest sequence number issued
+        self._sequence = itertools.count(1)  # next() is atomic across threads
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self._np_rng = np.random.default_rng()  # Used by generate_batch()
+        self._numeric_blocks = threading.local()  # Per-thread rows for _next_numeric_row
+        
+        # Choice pools snapshotted once, so the per-transaction path does
+        # not rebuild lists (or MCC_CODES.keys()) on every call
+        self._networks = tuple(self.NETWORKS)
+        self._card_types = tuple(self.CARD_TYPES)
+        self._funding_sources = tuple(self.FUNDING_SOURCES)
+        self._issuer_banks = tuple(self.ISSUER_BANKS)
+        self._acquirer_banks = tuple(self.ACQUIRER_BANKS)
+        self._merchant_names = tuple(self.MERCHANT_NAMES)
+        self._mcc_keys = tuple(self.MCC_CODES.keys())
+        self._cities_tuple = tuple(self.CITIES)
+        self._high_risk_countries = tuple(self.HIGH_RISK_COUNTRIES)
+        self._bin_pool = ("411111", "422222", "433333", "511111", "522222", "653333")
+        self._user_agents = ("Chrome/Windows", "Safari/MacOS", "Firefox/Linux", "Chrome/Android", "Safari/iOS")
+        # Invalid values injected into anomalous transactions
+        self._issue_types = ('validity_status', 'validity_network', 'validity_timestamp',
+                             'validity_amount', 'accuracy_mcc')
+        self._bad_statuses = ('cancelled', 'reversed', 'disputed', 'processing', 'timeout')
+        self._bad_networks = ('DISCOVER', 'JCB', 'UNIONPAY', 'MIR', 'EFTPOS')
+        self._bad_mccs = ('123', 'ABCD', '12345', 'XX')
+        # 4096 pre-generated 9-letter CAVVs, indexed by a 12-bit draw
+        letters = ''.join(random.choices(string.ascii_uppercase, k=9 * _CAVV_POOL_SIZE))
+        self._cavv_pool = tuple(letters[i:i + 9] for i in range(0, len(letters), 9))
         self.use_external_api = False
         self.last_api_error = None
         
+    @staticmethod
+    def _make_session() -> "requests.Session":
+        """
+        Session that retries failed GETs 3 times with 0.3s exponential backoff.
+        
+        Only connection errors and 5xx responses are retried. A read
+        timeout is not (read=0): each try already waits the full request
+        timeout, so retrying a hung endpoint would stall every call ~4x longer.
+        """
+        session = requests.Session()
+        retry = Retry(total=3, read=0, backoff_factor=0.3,
+                      status_forcelist=(500, 502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
     def set_api_key(self, api_key: str):
         """Set the API key for external data source."""
         self.api_key = api_key
@@ -98,31 +519,29 @@ class LiveDataGenerator:
         If api_url is configured, attempts to fetch from external API.
         Falls back to simulated data on failure or if no URL configured.
         """
-        self.transaction_count += 1
+        sequence_number = next(self._sequence)
+        self.transaction_count = sequence_number
         
         # Try external API first if configured
-        if self.use_external_api and self.api_url:
+        if self.use_external_api and self.api_url and self._session is None:
+            self.last_api_error = "requests is not installed"
+        elif self.use_external_api and self.api_url:
             try:
-                import requests
-                response = requests.get(
-                    self.api_url,
-                    headers=self.api_headers,
-                    timeout=5
-                )
-                if response.status_code == 200:
-                    data = response.json()
+                data = self._fetch_api_data()
+                if data is not None:
                     # Handle array response (take first or random item)
                     if isinstance(data, list) and len(data) > 0:
-                        import random as rnd
-                        data = rnd.choice(data)
+                        data = _thread_rng().choice(data)
                     # Wrap in expected format if needed
                     if 'transaction' not in data:
-                        data = self._wrap_external_data(data)
+                        data = self._wrap_external_data(data, sequence_number)
+                    else:
+                        data = dict(data)  # Cached responses are shared
                     data['_metadata'] = {
-                        'generated_at': datetime.utcnow().isoformat() + 'Z',
+                        'generated_at': _now_iso(),
                         'is_simulated': False,
                         'source': 'external_api',
-                        'sequence_number': self.transaction_count
+                        'sequence_number': sequence_number
                     }
                     self.last_api_error = None
                     return data
@@ -131,25 +550,250 @@ class LiveDataGenerator:
                 # Fall through to simulation
         
         # Generate simulated data
-        return self._generate_simulated_transaction()
+        return self._generate_simulated_transaction(sequence_number)
+    
+    def _fetch_api_data(self) -> Any:
+        """
+        GET the configured API URL and return the parsed JSON, or None on a
+        non-200 response. A response younger than cache_ttl seconds is
+        reused; the last _API_CACHE_SIZE (url, headers) keys are kept.
+        """
+        key = (self.api_url, tuple(sorted(self.api_headers.items())))
+        with self._api_cache_lock:
+            cached = self._api_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+                self._api_cache.move_to_end(key)
+                return cached[1]
+        
+        response = self._session.get(self.api_url, headers=self.api_headers, timeout=5)
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        with self._api_cache_lock:
+            self._api_cache[key] = (time.monotonic(), data)
+            self._api_cache.move_to_end(key)
+            while len(self._api_cache) > _API_CACHE_SIZE:
+                self._api_cache.popitem(last=False)
+        return data
+    
+    def generate_stream(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Generate n transactions, split into one chunk per worker thread.
+        
+        With workers=1 (the default) everything runs in the calling thread.
+        """
+        if self._pool is None or n < 2:
+            return [self.generate_transaction() for _ in range(n)]
+        
+        chunk_size = -(-n // self.workers)  # ceil(n / workers)
+        chunks = [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+        transactions = []
+        for chunk in self._pool.map(self._generate_chunk, chunks):
+            transactions.extend(chunk)
+        return transactions
+    
+    def _generate_chunk(self, count: int) -> List[Dict[str, Any]]:
+        """Generate one worker's share of a generate_stream() call."""
+        return [self.generate_transaction() for _ in range(count)]
+    
+    def generate_batch(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Generate n simulated transactions as columns (one array per field).
+        
+        Keys match flatten_for_dqs() output, so a batch can go straight into
+        a DataFrame without building n nested dicts first. Numeric and
+        branch-heavy fields come from one vectorized pass; the external API
+        is never used here.
+        """
+        rng = self._np_rng
+        is_anomaly = rng.random(n) < self.anomaly_rate
+        num = _derive_numeric_columns(rng, is_anomaly)
+        
+        # One clock read per batch; every row's dates derive from it
+        now = datetime.utcnow()
+        clearing_date = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+        settlement_date = (now + timedelta(days=2)).strftime("%Y-%m-%d")
+        # Rows are 0-5 seconds old, so only six distinct timestamps exist
+        ts_table = [(now - timedelta(seconds=k)).isoformat(timespec="microseconds") + "Z" for k in range(6)]
+        
+        def col(values):
+            return np.array(values, dtype=object)
+        
+        def choose(options, size=n):
+            # Index a small object array with one vectorized draw
+            return col(options)[rng.integers(0, len(options), size)]
+        
+        def randints(low, high):
+            # Inclusive bounds, like random.randint, drawn in one call
+            return rng.integers(low, high + 1, n).tolist()
+        
+        def sometimes(p_present, values):
+            present = rng.random(n) < p_present
+            return col([v if keep else "" for v, keep in zip(values, present)])
+        
+        def hex_ids(prefix, width, upper=False, random_bytes=rng.bytes):
+            # One draw per column instead of a uuid4() per row
+            digits = random_bytes(width // 2 * n).hex()
+            if upper:
+                digits = digits.upper()
+            return col([prefix + digits[i:i + width] for i in range(0, width * n, width)])
+        
+        # Merchant location (high-risk country for some anomalies)
+        cities = choose(self._cities_tuple)  # Shape (n, 3): city, state, postal code
+        foreign = num["foreign"]
+        country = np.where(foreign, choose(self._high_risk_countries), "IN").astype(object)
+        city = np.where(foreign, "Unknown", cities[:, 0]).astype(object)
+        state = np.where(foreign, "XX", cities[:, 1]).astype(object)
+        postal = cities[:, 2].copy()
+        
+        status = num["status"]
+        octets = [randints(1, 255) for _ in range(4)]
+        batch = {
+            "txn_transaction_id": hex_ids("txn_", 12, upper=True, random_bytes=os.urandom),
+            "txn_merchant_order_id": col([f"order_{v}" for v in randints(10000, 99999)]),
+            "txn_type": col(["authorization"] * n),
+            "txn_amount": num["amount"].copy(),
+            "txn_currency": col(["INR"] * n),
+            "txn_timestamp": col(ts_table)[rng.integers(0, len(ts_table), n)],
+            "txn_status": status.copy(),
+            "txn_response_code": num["response_code"],
+            "txn_authorization_code": np.where(
+                status == "approved", col([f"A{v}" for v in randints(10000, 99999)]), ""
+            ).astype(object),
+            
+            "card_network": choose(self._networks),
+            "card_pan_token": hex_ids("tok_", 12),
+            "card_bin": choose(self._bin_pool),
+            "card_last4": col([str(v) for v in randints(1000, 9999)]),
+            "card_expiry_month": col([f"{v:02d}" for v in randints(1, 12)]),
+            "card_expiry_year": col([str(v) for v in randints(2027, 2031)]),
+            "card_card_type": choose(self._card_types),
+            "card_funding_source": choose(self._funding_sources),
+            "card_issuer_bank": choose(self._issuer_banks),
+            
+            "merchant_merchant_id": col([f"MID_{v}" for v in randints(1000, 9999)]),
+            "merchant_terminal_id": col([f"TID_{v}" for v in randints(1000, 9999)]),
+            "merchant_merchant_name": choose(self._merchant_names),
+            "merchant_merchant_category_code": choose(self._mcc_keys),
+            "merchant_country": country,
+            "merchant_acquirer_bank": choose(self._acquirer_banks),
+            "merchant_settlement_account": col([f"XXXXXX{v}" for v in randints(1000, 9999)]),
+            
+            "customer_customer_id": hex_ids("cust_", 8),
+            "customer_email": sometimes(0.9, [f"user{v}@example.com" for v in randints(100, 999)]),
+            "customer_phone": sometimes(0.9, [f"+91{v}" for v in randints(7000000000, 9999999999)]),
+            "customer_billing_address_city": city,
+            "customer_billing_address_state": state,
+            "customer_billing_address_country": country,
+            "customer_billing_address_postal_code": postal,
+            "customer_shipping_address_city": city,
+            "customer_shipping_address_state": state,
+            "customer_shipping_address_country": country,
+            "customer_shipping_address_postal_code": postal,
+            "customer_ip_address": col([f"{a}.{b}.{c}.{d}" for a, b, c, d in zip(*octets)]),
+            "customer_device_fingerprint": hex_ids("fp_", 12),
+            "customer_user_agent": choose(self._user_agents),
+            
+            "fraud_risk_score": num["risk_score"],
+            "fraud_risk_level": num["risk_level"],
+            "fraud_velocity_check": num["velocity_check"],
+            "fraud_geo_check": num["geo_check"],
+            
+            "authentication_three_ds_version": choose(["2.1", "2.2", "1.0"]),
+            "authentication_eci": choose(["05", "06", "07"]),
+            "authentication_cavv": choose(self._cavv_pool),
+            "authentication_ds_transaction_id": hex_ids("ds_", 12),
+            "authentication_authentication_result": np.where(
+                rng.random(n) < 0.9, "authenticated", "failed"
+            ).astype(object),
+            
+            "network_network_transaction_id": hex_ids("net_", 12),
+            "network_acquirer_reference_number": col([
+                f"ARN_{v}" for v in randints(100000000000, 999999999999)
+            ]),
+            "network_routing_region": col(["APAC"] * n),
+            "network_interchange_category": col(["consumer_credit"] * n),
+            
+            "settlement_settlement_batch_id": hex_ids("batch_", 8),
+            "settlement_clearing_date": col([clearing_date] * n),
+            "settlement_settlement_date": col([settlement_date] * n),
+            "settlement_gross_amount": num["amount"],
+            "settlement_interchange_fee": num["interchange_fee"],
+            "settlement_gateway_fee": num["gateway_fee"],
+            "settlement_net_amount": num["net_amount"],
+            
+            "compliance_sca_applied": rng.random(n) < 0.5,
+            "compliance_psd2_exemption": col([""] * n),
+            "compliance_aml_screening": np.where(rng.random(n) < 0.95, "clear", "review").astype(object),
+        }
+        
+        # Same data quality issues as the per-transaction path: each anomaly
+        # gets 2-3 distinct issue types, picked by ranking 5 uniform draws
+        anomalies = np.flatnonzero(is_anomaly)
+        issue_count = rng.integers(2, 4, len(anomalies))
+        ranks = rng.random((len(anomalies), len(self._issue_types))).argsort(axis=1).argsort(axis=1)
+        has_issue = ranks < issue_count[:, None]
+        for j, issue_type in enumerate(self._issue_types):
+            rows = anomalies[has_issue[:, j]]
+            if not len(rows):
+                continue
+            if issue_type == 'validity_status':
+                batch["txn_status"][rows] = choose(self._bad_statuses, len(rows))
+            elif issue_type == 'validity_network':
+                batch["card_network"][rows] = choose(self._bad_networks, len(rows))
+            elif issue_type == 'validity_timestamp':
+                # Format each distinct day offset once
+                days, inverse = np.unique(rng.integers(400, 801, len(rows)), return_inverse=True)
+                old_dates = col([(now - timedelta(days=int(d))).isoformat(timespec="microseconds") + "Z" for d in days])
+                batch["txn_timestamp"][rows] = old_dates[inverse]
+            elif issue_type == 'validity_amount':
+                batch["txn_amount"][rows] = rng.integers(15000000, 100000000, len(rows))
+            elif issue_type == 'accuracy_mcc':
+                batch["merchant_merchant_category_code"][rows] = choose(self._bad_mccs, len(rows))
+        
+        return batch
+    
+    def generate_batch_frame(self, n: int) -> pd.DataFrame:
+        """
+        Generate n simulated transactions as a DataFrame in flat DQS format.
+        
+        Low-cardinality string columns are dictionary-encoded as categoricals,
+        which keeps the frame compact and cheap to group or export.
+        """
+        batch = self.generate_batch(n)
+        for name in _CATEGORICAL_COLUMNS:
+            batch[name] = pd.Categorical(batch[name])
+        return pd.DataFrame(batch, copy=False)
     
-    def _wrap_external_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Wrap flat external data into expected nested format."""
+    def _wrap_external_data(self, data: Dict[str, Any], sequence_number: int) -> Dict[str, Any]:
+        """
+        Wrap flat external data into expected nested format.
+        
+        Fallback keys and defaults are only looked up or built when the
+        preferred key is absent (a present None is kept, as with .get).
+        """
         return {
             'transaction': {
-                'transaction_id': data.get('transaction_id', data.get('id', f'ext_{self.transaction_count}')),
+                'transaction_id': (
+                    data['transaction_id'] if 'transaction_id' in data
+                    else data['id'] if 'id' in data
+                    else f'ext_{sequence_number}'
+                ),
                 'amount': data.get('amount', 0),
                 'currency': data.get('currency', 'INR'),
-                'timestamp': data.get('timestamp', datetime.utcnow().isoformat() + 'Z'),
+                'timestamp': (
+                    data['timestamp'] if 'timestamp' in data
+                    else _now_iso()
+                ),
                 'status': data.get('status', 'approved'),
             },
             'card': {
-                'network': data.get('network', data.get('card_network', 'VISA')),
+                'network': data['network'] if 'network' in data else data.get('card_network', 'VISA'),
                 'card_type': data.get('card_type', 'credit'),
             },
             'merchant': {
                 'merchant_id': data.get('merchant_id', 'MID_EXT'),
-                'country': data.get('country', data.get('merchant_country', 'IN')),
+                'country': data['country'] if 'country' in data else data.get('merchant_country', 'IN'),
             },
             'customer': {
                 'customer_id': data.get('customer_id', 'cust_ext'),
@@ -160,60 +804,38 @@ class LiveDataGenerator:
             '_original': data
         }
     
-    def _generate_simulated_transaction(self) -> Dict[str, Any]:
+    def _generate_simulated_transaction(self, sequence_number: int) -> Dict[str, Any]:
         """Generate a simulated transaction (original logic)."""
-        is_anomaly = random.random() < self.anomaly_rate
+        rng = _thread_rng()
+        # Amount, status, risk and settlement fields come from the
+        # vectorized kernel shared with generate_batch()
+        (is_anomaly, amount, status, response_code, foreign, risk_score, risk_level,
+         velocity_check, geo_check, interchange_fee, gateway_fee, net_amount) = \
+            _next_numeric_row(self._numeric_blocks, self.anomaly_rate)
         
-        # Generate unique IDs
-        txn_id = f"txn_{uuid.uuid4().hex[:12].upper()}"
-        order_id = f"order_{random.randint(10000, 99999)}"
+        # Generate unique IDs. Only the transaction ID uses OS randomness;
+        # the synthetic ones are sliced from one 336-bit draw.
+        txn_id = f"txn_{os.urandom(6).hex().upper()}"
+        ids = f"{rng.getrandbits(336):084x}"
+        order_id = f"order_{rng.randint(10000, 99999)}"
         
         # Timestamp (current time with slight variation)
-        timestamp = datetime.utcnow() - timedelta(seconds=random.randint(0, 5))
-        
-        # Amount - higher for anomalies
-        if is_anomaly and random.random() < 0.5:
-            amount = random.randint(50000, 500000)  # High value
-        else:
-            amount = random.choice([
-                random.randint(100, 1000),      # Small
-                random.randint(1000, 5000),     # Medium
-                random.randint(5000, 20000),    # Large
-            ])
-        
-        # Status
-        if is_anomaly and random.random() < 0.3:
-            status = random.choice(["declined", "failed", "pending"])
-            response_code = random.choice(["05", "51", "14", "54"])
-        else:
-            status = "approved"
-            response_code = "00"
+        timestamp = _now_iso(rng.randint(0, 5))
         
         # Card details
-        network = random.choice(self.NETWORKS)
-        bin_number = random.choice(["411111", "422222", "433333", "511111", "522222", "653333"])
+        network = rng.choice(self._networks)
+        bin_number = rng.choice(self._bin_pool)
         
         # Merchant
-        city, state, postal = random.choice(self.CITIES)
+        city, state, postal = rng.choice(self._cities_tuple)
         country = "IN"
-        if is_anomaly and random.random() < 0.4:
-            country = random.choice(self.HIGH_RISK_COUNTRIES)
+        if foreign:
+            country = rng.choice(self._high_risk_countries)
             city = "Unknown"
             state = "XX"
         
-        mcc = random.choice(list(self.MCC_CODES.keys()))
-        
-        # Risk score
-        if is_anomaly:
-            risk_score = random.randint(60, 99)
-            risk_level = "high" if risk_score > 80 else "medium"
-        else:
-            risk_score = random.randint(5, 40)
-            risk_level = "low"
-        
-        # Velocity/geo checks
-        velocity_check = "fail" if (is_anomaly and random.random() < 0.4) else "pass"
-        geo_check = "fail" if (is_anomaly and random.random() < 0.3) else "pass"
+        mcc = rng.choice(self._mcc_keys)
+        clearing_date, settlement_date = _settlement_dates()
         
         transaction = {
             "transaction": {
@@ -222,35 +844,35 @@ class LiveDataGenerator:
                 "type": "authorization",
                 "amount": amount,
                 "currency": "INR",
-                "timestamp": timestamp.isoformat() + "Z",
+                "timestamp": timestamp,
                 "status": status,
                 "response_code": response_code,
-                "authorization_code": f"A{random.randint(10000, 99999)}" if status == "approved" else None
+                "authorization_code": f"A{rng.randint(10000, 99999)}" if status == "approved" else None
             },
             "card": {
                 "network": network,
-                "pan_token": f"tok_{uuid.uuid4().hex[:12]}",
+                "pan_token": f"tok_{ids[0:12]}",
                 "bin": bin_number,
-                "last4": str(random.randint(1000, 9999)),
-                "expiry_month": f"{random.randint(1, 12):02d}",
-                "expiry_year": str(random.randint(2027, 2031)),
-                "card_type": random.choice(self.CARD_TYPES),
-                "funding_source": random.choice(self.FUNDING_SOURCES),
-                "issuer_bank": random.choice(self.ISSUER_BANKS)
+                "last4": str(rng.randint(1000, 9999)),
+                "expiry_month": f"{rng.randint(1, 12):02d}",
+                "expiry_year": str(rng.randint(2027, 2031)),
+                "card_type": rng.choice(self._card_types),
+                "funding_source": rng.choice(self._funding_sources),
+                "issuer_bank": rng.choice(self._issuer_banks)
             },
             "merchant": {
-                "merchant_id": f"MID_{random.randint(1000, 9999)}",
-                "terminal_id": f"TID_{random.randint(1000, 9999)}",
-                "merchant_name": random.choice(self.MERCHANT_NAMES),
+                "merchant_id": f"MID_{rng.randint(1000, 9999)}",
+                "terminal_id": f"TID_{rng.randint(1000, 9999)}",
+                "merchant_name": rng.choice(self._merchant_names),
                 "merchant_category_code": mcc,
                 "country": country,
-                "acquirer_bank": random.choice(self.ACQUIRER_BANKS),
-                "settlement_account": f"XXXXXX{random.randint(1000, 9999)}"
+                "acquirer_bank": rng.choice(self._acquirer_banks),
+                "settlement_account": f"XXXXXX{rng.randint(1000, 9999)}"
             },
             "customer": {
-                "customer_id": f"cust_{uuid.uuid4().hex[:8]}",
-                "email": f"user{random.randint(100, 999)}@example.com" if random.random() > 0.1 else None,
-                "phone": f"+91{random.randint(7000000000, 9999999999)}" if random.random() > 0.1 else None,
+                "customer_id": f"cust_{ids[12:20]}",
+                "email": f"user{rng.randint(100, 999)}@example.com" if rng.random() > 0.1 else None,
+                "phone": f"+91{rng.randint(7000000000, 9999999999)}" if rng.random() > 0.1 else None,
                 "billing_address": {
                     "city": city,
                     "state": state,
@@ -263,16 +885,16 @@ class LiveDataGenerator:
                     "country": country,
                     "postal_code": postal
                 },
-                "ip_address": f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}",
-                "device_fingerprint": f"fp_{uuid.uuid4().hex[:12]}",
-                "user_agent": random.choice(["Chrome/Windows", "Safari/MacOS", "Firefox/Linux", "Chrome/Android", "Safari/iOS"])
+                "ip_address": f"{rng.randint(1,255)}.{rng.randint(1,255)}.{rng.randint(1,255)}.{rng.randint(1,255)}",
+                "device_fingerprint": f"fp_{ids[20:32]}",
+                "user_agent": rng.choice(self._user_agents)
             },
             "authentication": {
-                "three_ds_version": random.choice(["2.1", "2.2", "1.0"]),
-                "eci": random.choice(["05", "06", "07"]),
-                "cavv": f"{''.join(random.choices(string.ascii_uppercase, k=9))}",
-                "ds_transaction_id": f"ds_{uuid.uuid4().hex[:12]}",
-                "authentication_result": "authenticated" if random.random() > 0.1 else "failed"
+                "three_ds_version": rng.choice(("2.1", "2.2", "1.0")),
+                "eci": rng.choice(("05", "06", "07")),
+                "cavv": self._cavv_pool[rng.getrandbits(12)],
+                "ds_transaction_id": f"ds_{ids[32:44]}",
+                "authentication_result": "authenticated" if rng.random() > 0.1 else "failed"
             },
             "fraud": {
                 "risk_score": risk_score,
@@ -281,216 +903,462 @@ class LiveDataGenerator:
                 "geo_check": geo_check
             },
             "network": {
-                "network_transaction_id": f"net_{uuid.uuid4().hex[:12]}",
-                "acquirer_reference_number": f"ARN_{random.randint(100000000000, 999999999999)}",
+                "network_transaction_id": f"net_{ids[44:56]}",
+                "acquirer_reference_number": f"ARN_{rng.randint(100000000000, 999999999999)}",
                 "routing_region": "APAC",
                 "interchange_category": "consumer_credit"
             },
             "compliance": {
-                "sca_applied": random.choice([True, False]),
+                "sca_applied": rng.choice((True, False)),
                 "psd2_exemption": None,
-                "aml_screening": "clear" if random.random() > 0.05 else "review",
-                "tax_reference": f"GST_{uuid.uuid4().hex[:8].upper()}",
-                "audit_log_id": f"audit_{uuid.uuid4().hex[:12]}"
+                "aml_screening": "clear" if rng.random() > 0.05 else "review",
+                "tax_reference": f"GST_{ids[56:64].upper()}",
+                "audit_log_id": f"audit_{ids[64:76]}"
             },
             "settlement": {
-                "settlement_batch_id": f"batch_{uuid.uuid4().hex[:8]}",
-                "clearing_date": (datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d"),
-                "settlement_date": (datetime.utcnow() + timedelta(days=2)).strftime("%Y-%m-%d"),
+                "settlement_batch_id": f"batch_{ids[76:84]}",
+                "clearing_date": clearing_date,
+                "settlement_date": settlement_date,
                 "gross_amount": amount,
-                "interchange_fee": int(amount * 0.008),
-                "gateway_fee": int(amount * 0.003),
-                "net_amount": amount - int(amount * 0.011)
+                "interchange_fee": interchange_fee,
+                "gateway_fee": gateway_fee,
+                "net_amount": net_amount
             },
             "business_metadata": {
-                "invoice_number": f"INV_{random.randint(10000, 99999)}",
-                "product_category": random.choice(["Electronics", "Fashion", "Food", "Travel", "Entertainment", "Services"]),
-                "promo_code": random.choice([None, "NEWUSER", "SAVE10", "SPECIAL"]),
-                "campaign": random.choice([None, "HolidaySale", "Weekend", "Flash"]),
+                "invoice_number": f"INV_{rng.randint(10000, 99999)}",
+                "product_category": rng.choice(("Electronics", "Fashion", "Food", "Travel", "Entertainment", "Services")),
+                "promo_code": rng.choice((None, "NEWUSER", "SAVE10", "SPECIAL")),
+                "campaign": rng.choice((None, "HolidaySale", "Weekend", "Flash")),
                 "notes": None
             },
             "_metadata": {
-                "generated_at": datetime.utcnow().isoformat() + "Z",
+                "generated_at": _now_iso(),
                 "is_simulated": True,
-                "sequence_number": self.transaction_count,
+                "sequence_number": sequence_number,
                 "is_anomaly": is_anomaly
             }
         }
         
-        # Introduce DATA QUALITY issues for anomalous transactions
-        # These SPECIFICALLY target the checks in layer4_2_field_compliance.py
+        # Normal transactions (most of them) are returned as built; only
+        # anomalies go through the issue injection below
         if is_anomaly:
-            # Pick 2-3 issues to combine for lower DQS
-            issue_types = random.sample(
-                ['validity_status', 'validity_network', 'validity_timestamp', 'validity_amount', 'accuracy_mcc'],
-                k=random.randint(2, 3)
-            )
-            
-            for issue_type in issue_types:
-                if issue_type == 'validity_status':
-                    # Status NOT in ["approved", "declined", "pending", "failed"]
-                    transaction['transaction']['status'] = random.choice(['cancelled', 'reversed', 'disputed', 'processing', 'timeout'])
-                    
-                elif issue_type == 'validity_network':
-                    # Card network NOT in ["visa", "mastercard", "rupay", "amex", "diners"]
-                    transaction['card']['network'] = random.choice(['DISCOVER', 'JCB', 'UNIONPAY', 'MIR', 'EFTPOS'])
-                    
-                elif issue_type == 'validity_timestamp':
-                    # Timestamp older than 365 days (fails validity check)
-                    old_date = datetime.utcnow() - timedelta(days=random.randint(400, 800))
-                    transaction['transaction']['timestamp'] = old_date.isoformat() + "Z"
-                    
-                elif issue_type == 'validity_amount':
-                    # Amount > 10,000,000 (fails validity check)
-                    transaction['transaction']['amount'] = random.randint(15000000, 99999999)
-                    
-                elif issue_type == 'accuracy_mcc':
-                    # MCC not 4 digits (fails accuracy check)
-                    transaction['merchant']['merchant_category_code'] = random.choice(['123', 'ABCD', '12345', 'XX'])
-        
+            self._inject_quality_issues(transaction, rng)
         return transaction
     
+    def _inject_quality_issues(self, transaction: Dict[str, Any], rng: random.Random):
+        """
+        Introduce DATA QUALITY issues into an anomalous transaction in place.
+        These SPECIFICALLY target the checks in layer4_2_field_compliance.py
+        """
+        txn = transaction['transaction']
+        # Pick 2-3 issues to combine for lower DQS
+        for issue_type in rng.sample(self._issue_types, k=rng.randint(2, 3)):
+            if issue_type == 'validity_status':
+                # Status NOT in ["approved", "declined", "pending", "failed"]
+                txn['status'] = rng.choice(self._bad_statuses)
+                
+            elif issue_type == 'validity_network':
+                # Card network NOT in ["visa", "mastercard", "rupay", "amex", "diners"]
+                transaction['card']['network'] = rng.choice(self._bad_networks)
+                
+            elif issue_type == 'validity_timestamp':
+                # Timestamp older than 365 days (fails validity check)
+                txn['timestamp'] = _now_iso(rng.randint(400, 800) * 86400)
+                
+            elif issue_type == 'validity_amount':
+                # Amount > 10,000,000 (fails validity check)
+                txn['amount'] = rng.randint(15000000, 99999999)
+                
+            elif issue_type == 'accuracy_mcc':
+                # MCC not 4 digits (fails accuracy check)
+                transaction['merchant']['merchant_category_code'] = rng.choice(self._bad_mccs)
+    
     def flatten_for_dqs(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
         """
         Flatten nested transaction to match DQS engine input format.
         Uses prefixed column names like txn_, card_, merchant_ to match Layer 4.2 expectations.
         Ensures NO None values are returned to prevent pipeline crashes.
-        """
-        txn = transaction.get("transaction", {})
-        card = transaction.get("card", {})
-        merchant = transaction.get("merchant", {})
-        customer = transaction.get("customer", {})
-        fraud = transaction.get("fraud", {})
-        auth = transaction.get("authentication", {})
-        settlement = transaction.get("settlement", {})
-        network = transaction.get("network", {})
-        compliance = transaction.get("compliance", {})
         
-        billing = customer.get("billing_address", {})
-        shipping = customer.get("shipping_address", {})
-        
-        return {
-            # Transaction fields (txn_ prefix)
-            "txn_transaction_id": txn.get("transaction_id") or "",
-            "txn_merchant_order_id": txn.get("merchant_order_id") or "",
-            "txn_type": txn.get("type") or "",
-            "txn_amount": txn.get("amount") or 0,
-            "txn_currency": txn.get("currency") or "INR",
-            "txn_timestamp": txn.get("timestamp") or "",
-            "txn_status": txn.get("status") or "",
-            "txn_response_code": txn.get("response_code") or "",
-            "txn_authorization_code": txn.get("authorization_code") or "",
-            
-            # Card fields (card_ prefix)
-            "card_network": card.get("network") or "",
-            "card_pan_token": card.get("pan_token") or "",
-            "card_bin": card.get("bin") or "",
-            "card_last4": card.get("last4") or "",
-            "card_expiry_month": card.get("expiry_month") or "",
-            "card_expiry_year": card.get("expiry_year") or "",
-            "card_card_type": card.get("card_type") or "",
-            "card_funding_source": card.get("funding_source") or "",
-            "card_issuer_bank": card.get("issuer_bank") or "",
-            
-            # Merchant fields (merchant_ prefix)
-            "merchant_merchant_id": merchant.get("merchant_id") or "",
-            "merchant_terminal_id": merchant.get("terminal_id") or "",
-            "merchant_merchant_name": merchant.get("merchant_name") or "",
-            "merchant_merchant_category_code": merchant.get("merchant_category_code") or "",
-            "merchant_country": merchant.get("country") or "",
-            "merchant_acquirer_bank": merchant.get("acquirer_bank") or "",
-            "merchant_settlement_account": merchant.get("settlement_account") or "",
-            
-            # Customer fields (customer_ prefix)
-            "customer_customer_id": customer.get("customer_id") or "",
-            "customer_email": customer.get("email") or "",
-            "customer_phone": customer.get("phone") or "",
-            "customer_billing_address_city": billing.get("city") or "",
-            "customer_billing_address_state": billing.get("state") or "",
-            "customer_billing_address_country": billing.get("country") or "",
-            "customer_billing_address_postal_code": billing.get("postal_code") or "",
-            "customer_shipping_address_city": shipping.get("city") or "",
-            "customer_shipping_address_state": shipping.get("state") or "",
-            "customer_shipping_address_country": shipping.get("country") or "",
-            "customer_shipping_address_postal_code": shipping.get("postal_code") or "",
-            "customer_ip_address": customer.get("ip_address") or "",
-            "customer_device_fingerprint": customer.get("device_fingerprint") or "",
-            "customer_user_agent": customer.get("user_agent") or "",
-            
-            # Fraud fields (fraud_ prefix)
-            "fraud_risk_score": fraud.get("risk_score") or 0,
-            "fraud_risk_level": fraud.get("risk_level") or "",
-            "fraud_velocity_check": fraud.get("velocity_check") or "",
-            "fraud_geo_check": fraud.get("geo_check") or "",
-            
-            # Authentication fields (authentication_ prefix)
-            "authentication_three_ds_version": auth.get("three_ds_version") or "",
-            "authentication_eci": auth.get("eci") or "",
-            "authentication_cavv": auth.get("cavv") or "",
-            "authentication_ds_transaction_id": auth.get("ds_transaction_id") or "",
-            "authentication_authentication_result": auth.get("authentication_result") or "",
-            
-            # Network fields (network_ prefix)
-            "network_network_transaction_id": network.get("network_transaction_id") or "",
-            "network_acquirer_reference_number": network.get("acquirer_reference_number") or "",
-            "network_routing_region": network.get("routing_region") or "",
-            "network_interchange_category": network.get("interchange_category") or "",
-            
-            # Settlement fields (settlement_ prefix)
-            "settlement_settlement_batch_id": settlement.get("settlement_batch_id") or "",
-            "settlement_clearing_date": settlement.get("clearing_date") or "",
-            "settlement_settlement_date": settlement.get("settlement_date") or "",
-            "settlement_gross_amount": settlement.get("gross_amount") or 0,
-            "settlement_interchange_fee": settlement.get("interchange_fee") or 0,
-            "settlement_gateway_fee": settlement.get("gateway_fee") or 0,
-            "settlement_net_amount": settlement.get("net_amount") or 0,
-            
-            # Compliance fields (compliance_ prefix)
-            "compliance_sca_applied": compliance.get("sca_applied", False),
-            "compliance_psd2_exemption": compliance.get("psd2_exemption") or "",
-            "compliance_aml_screening": compliance.get("aml_screening") or "",
-        }
-import threading
+        Complete transactions (everything the simulator produces) take the
+        direct-subscript function generated from _FLAT_SPEC; anything with a
+        missing key or section falls back to the tolerant lookups.
+        """
+        try:
+            return _flatten_complete(transaction)
+        except (KeyError, TypeError):
+            return _flatten_tolerant(transaction)
+
+
+# Writer-queue marker asking the writer thread to truncate the log file
+_CLEAR_FILE = object()
+# Writer-queue marker asking the writer thread to fsync, close and exit
+_CLOSE_FILE = object()
+
+# Log lines start with their timestamp (first key of every log entry),
+# so history scans can filter without parsing the whole line
+_LINE_TIMESTAMP = re.compile(rb'\{"timestamp":\s*"([^"]*)"')
+
+# Low-cardinality string fields of a logged transaction, by section. Parsed
+# JSON makes a fresh string per value, so reloaded logs intern these.
+_SHARED_TRANSACTION_FIELDS = {
+    "transaction": ("type", "currency", "status", "response_code"),
+    "card": ("network", "bin", "expiry_month", "expiry_year", "card_type",
+             "funding_source", "issuer_bank"),
+    "merchant": ("merchant_name", "merchant_category_code", "country", "acquirer_bank"),
+    "customer": ("user_agent",),
+    "authentication": ("three_ds_version", "eci", "authentication_result"),
+    "fraud": ("risk_level", "velocity_check", "geo_check"),
+    "network": ("routing_region", "interchange_category"),
+    "compliance": ("aml_screening",),
+    "settlement": ("clearing_date", "settlement_date"),
+    "business_metadata": ("product_category", "promo_code", "campaign"),
+}
+_SHARED_ADDRESS_FIELDS = ("city", "state", "country", "postal_code")
+
+
+def _intern_fields(section: Any, fields: tuple):
+    """Intern the given string fields of a dict in place."""
+    if isinstance(section, dict):
+        for field in fields:
+            value = section.get(field)
+            if type(value) is str:
+                section[field] = sys.intern(value)
+
+
+def _share_repeated_values(log_entry: Dict[str, Any]):
+    """
+    Deduplicate repeated values in a log entry parsed from disk.
+    
+    Interns the low-cardinality strings and, when the billing and shipping
+    addresses are equal (as the generator makes them), keeps one dict for
+    both. Cuts memory of reloaded logs by about a quarter.
+    """
+    _intern_fields(log_entry, ("action", "status"))
+    transaction = log_entry.get("full_transaction")
+    if not isinstance(transaction, dict):
+        return
+    for section, fields in _SHARED_TRANSACTION_FIELDS.items():
+        _intern_fields(transaction.get(section), fields)
+    customer = transaction.get("customer")
+    if isinstance(customer, dict):
+        billing = customer.get("billing_address")
+        _intern_fields(billing, _SHARED_ADDRESS_FIELDS)
+        if billing is not None and customer.get("shipping_address") == billing:
+            customer["shipping_address"] = billing
+        else:
+            _intern_fields(customer.get("shipping_address"), _SHARED_ADDRESS_FIELDS)
+
+
+def _parse_log_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """Parse one log line read from disk; None for blank, partial or non-object lines."""
+    if not line.strip():
+        return None
+    try:
+        log_entry = _loads(line)
+    except ValueError:
+        return None
+    if not isinstance(log_entry, dict):
+        return None  # Valid JSON but not a log entry
+    _share_repeated_values(log_entry)
+    return log_entry
+
+
+# Small integer code per pipeline action; anything else counts as "other"
+_ACTION_CODES = {action.value: code for code, action in enumerate(Action)}
+_OTHER_ACTION = len(_ACTION_CODES)
+
+
+def _log_score(value: Any) -> float:
+    """DQS score of a log entry as a finite float; 100 for a missing, non-numeric, NaN or infinite one."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return float(value)
+    return 100.0
 
 
 class LiveLogStorage:
     """
     Persistent storage for live stream logs.
-    Stores logs to a JSON file for persistence across restarts.
-    Thread-safe for concurrent access.
+    Appends logs to a JSON Lines file (one entry per line) for persistence
+    across restarts, so each add costs one line of I/O instead of a rewrite.
+    Disk writes happen on a background writer thread so producers never
+    wait on I/O. Only the most recent max_in_memory logs are kept in memory;
+    once the file reaches rotate_mb it is gzipped to
+    <name>.<UTC timestamp>.jsonl.gz and a fresh file is started. Older logs
+    stay queryable through get_logs(). Thread-safe for concurrent access.
     """
     
-    def __init__(self, log_file: str = "live_stream_logs.json"):
+    def __init__(self, log_file: str = "live_stream_logs.jsonl", max_in_memory: int = 100_000,
+                 rotate_mb: float = 64):
         self.log_file = log_file
+        self.max_in_memory = max_in_memory
+        self.rotate_bytes = int(rotate_mb * 1024 * 1024)
         self.logs = []
+        # True once some logs exist only on disk (trimmed or rotated out)
+        self._has_disk_history = bool(self._rotated_files())
+        # Timestamps parallel to self.logs. Kept in ascending order (add_log
+        # clamps against the last one) so time-range queries can bisect.
+        self._timestamps = []
         self._lock = threading.Lock()
+        # Compact columns parallel to self.logs, used to recount in bulk
+        self._action_codes = array('b')
+        self._dqs_scores = array('d')
+        # Running aggregates so get_stats() does not rescan every log
+        self._action_counts = [0] * (_OTHER_ACTION + 1)  # Indexed by action code
+        self._dqs_sum = 0.0
+        self._torn_tail = False  # Last line on disk lacks its newline
+        self.last_write_error = None  # Most recent failure of the writer thread
         self._load_logs()
+        self._fh = None  # Stays None if the file cannot be opened; logs are then memory-only
+        try:
+            self._fh = open(self.log_file, 'ab', buffering=1 << 16)
+            if self._torn_tail:
+                # Terminate the partial line so the next append starts cleanly
+                self._fh.write(b"\n")
+        except OSError as e:
+            self.last_write_error = str(e)
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+        # Log entries and control markers, drained in order by _writer
+        self._write_q = queue.SimpleQueue()
+        self._writer_thread = threading.Thread(target=self._writer, daemon=True)
+        self._writer_thread.start()
     
     def _load_logs(self):
-        """Load existing logs from file."""
-        if os.path.exists(self.log_file):
+        """
+        Load the most recent max_in_memory logs from disk.
+        
+        The current file is memory-mapped and walked backwards one line at
+        a time, so start-up cost depends on max_in_memory rather than file
+        size. When it holds fewer logs than that (e.g. soon after a
+        rotation), the window is filled from the newest rotated archives.
+        Partially written lines and lines that are not JSON objects are
+        skipped.
+        """
+        newest_first = []
+        try:
+            with open(self.log_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_size > 0:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        self._torn_tail = mm[-1:] != b"\n"
+                        end = len(mm)
+                        while end > 0 and len(newest_first) < self.max_in_memory:
+                            start = mm.rfind(b"\n", 0, end - 1) + 1
+                            log_entry = _parse_log_line(mm[start:end])
+                            end = start
+                            if log_entry is not None:
+                                newest_first.append(log_entry)
+                        if end > 0:
+                            self._has_disk_history = True
+        except FileNotFoundError:
+            pass
+        except (IOError, ValueError):
+            newest_first = []
+        
+        for path in reversed(self._rotated_files()):
+            remaining = self.max_in_memory - len(newest_first)
+            if remaining <= 0:
+                break
+            lines = self._iter_lines(path)
             try:
-                with open(self.log_file, 'r') as f:
-                    self.logs = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                self.logs = []
+                # Archives are gzip streams, so read forwards keeping the tail
+                tail = deque(lines, maxlen=remaining)
+            except (IOError, ValueError, EOFError):
+                break  # Unreadable archive; stop rather than leave a gap
+            finally:
+                lines.close()
+            for line in reversed(tail):
+                log_entry = _parse_log_line(line)
+                if log_entry is not None:
+                    newest_first.append(log_entry)
+        
+        self.logs = newest_first[::-1]
+        for log_entry in self.logs:
+            self._action_codes.append(_ACTION_CODES.get(log_entry.get("action"), _OTHER_ACTION))
+            self._dqs_scores.append(_log_score(log_entry.get("dqs_score")))
+            self._timestamps.append(log_entry.get("timestamp", ""))
+        self._recount()
+    
+    def _count_log(self, log_entry: Dict[str, Any]):
+        """Record one new log in the columns and running aggregates (must be called with lock held)."""
+        code = _ACTION_CODES.get(log_entry.get("action"), _OTHER_ACTION)
+        score = _log_score(log_entry.get("dqs_score"))
+        self._action_codes.append(code)
+        self._dqs_scores.append(score)
+        self._action_counts[code] += 1
+        self._dqs_sum += score
     
-    def _save_logs(self):
-        """Save logs to file (must be called with lock held)."""
+    def _recount(self):
+        """
+        Rebuild the running aggregates from the compact columns in one
+        vectorized pass (must be called with lock held). Also resets any
+        float drift in the running DQS sum.
+        """
+        if not self._action_codes:
+            self._action_counts = [0] * (_OTHER_ACTION + 1)
+            self._dqs_sum = 0.0
+            return
+        codes = np.frombuffer(self._action_codes, dtype=np.int8)
+        self._action_counts = np.bincount(codes, minlength=_OTHER_ACTION + 1).tolist()
+        self._dqs_sum = float(np.frombuffer(self._dqs_scores, dtype=np.float64).sum())
+    
+    def _trim_logs(self):
+        """
+        Drop the oldest logs once memory holds more than max_in_memory
+        (must be called with lock held).
+        
+        Trims down to 90% of the limit in one go so the O(N) list shift is
+        paid once per max_in_memory/10 adds rather than on every add. The
+        log file still holds the dropped entries.
+        """
+        if len(self.logs) <= self.max_in_memory:
+            return
+        excess = len(self.logs) - self.max_in_memory * 9 // 10
+        # Rebind rather than delete in place: get_logs() may still be
+        # copying out of the old list after releasing the lock
+        self.logs = self.logs[excess:]
+        self._timestamps = self._timestamps[excess:]
+        del self._action_codes[:excess]
+        del self._dqs_scores[:excess]
+        self._recount()
+        self._has_disk_history = True
+    
+    def _rotated_files(self) -> list:
+        """Rotated log files (gzip archives or, if compression was cut short, plain), oldest first."""
+        root, ext = os.path.splitext(self.log_file)
+        pattern = f"{glob.escape(root)}.*{ext}"
+        archives = set(glob.glob(pattern + ".gz"))
+        plain = [path for path in glob.glob(pattern) if path + ".gz" not in archives]
+        return sorted(plain + list(archives))
+    
+    def _rotate(self):
+        """
+        Move the current log file aside, start a new one and gzip the old
+        one (writer thread only). Producers keep queueing meanwhile.
+        """
+        if self._fh is None:
+            return
+        self._fh.close()
+        self._fh = None  # Until the new file is open
+        root, ext = os.path.splitext(self.log_file)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        rotated = f"{root}.{stamp}{ext}"
+        os.replace(self.log_file, rotated)
+        self._fh = open(self.log_file, 'ab', buffering=1 << 16)
+        self._has_disk_history = True
+        
+        # Compress to a temporary name first so a crash never leaves a
+        # truncated archive; the plain file is still readable until then
+        with open(rotated, 'rb') as src, gzip.open(rotated + ".gz.tmp", 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(rotated + ".gz.tmp", rotated + ".gz")
+        os.remove(rotated)
+    
+    def _writer(self):
+        """Drain queued logs to the file in batches (runs on the writer thread)."""
+        while True:
+            batch = [self._write_q.get()]
+            while True:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            lines = []
+            for item in batch:
+                if isinstance(item, dict):
+                    line = self._encode_log(item)
+                    if line is not None:
+                        lines.append(line)
+                    continue
+                # Control marker: write everything queued before it first
+                try:
+                    self._write_lines(lines)
+                    lines = []
+                    if item is _CLEAR_FILE:
+                        self._clear_files()
+                    elif item is _CLOSE_FILE:
+                        self._close_file()
+                        return
+                except Exception as e:
+                    # Never let one failure stop the writer or strand a flush()
+                    self.last_write_error = str(e)
+                    if item is _CLOSE_FILE:
+                        return
+                finally:
+                    if isinstance(item, threading.Event):
+                        item.set()
+            try:
+                self._write_lines(lines)
+            except Exception as e:
+                self.last_write_error = str(e)
+    
+    def _encode_log(self, log_entry: Dict[str, Any]) -> Optional[bytes]:
+        """
+        Encode one log entry as a JSON line (writer thread only).
+        
+        orjson rejects some values the json module accepts (e.g. integers
+        wider than 64 bits from an external API payload), so those entries
+        go through json.dumps instead. An entry neither can encode is
+        dropped and noted in last_write_error.
+        """
+        try:
+            return _dumps(log_entry) + b"\n"
+        except (TypeError, ValueError, OverflowError):
+            pass
         try:
-            with open(self.log_file, 'w') as f:
-                json.dump(self.logs, f, indent=2, default=str)
+            return json.dumps(log_entry, default=str).encode('utf-8') + b"\n"
+        except (TypeError, ValueError, OverflowError) as e:
+            self.last_write_error = f"Dropped log {log_entry.get('transaction_id')}: {e}"
+            return None
+    
+    def _clear_files(self):
+        """Truncate the log file and remove rotated archives (writer thread only)."""
+        if self._fh is None:
+            return
+        try:
+            self._fh.truncate(0)
+            # truncate() leaves the cached position alone; rewind it so
+            # tell(), and with it rotation, counts from the empty file
+            self._fh.seek(0)
+            for path in self._rotated_files():
+                os.remove(path)
+        except IOError:
+            pass
+    
+    def _close_file(self):
+        """Fsync and close the log file (writer thread only)."""
+        if self._fh is None:
+            return
+        try:
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+        except IOError:
+            pass
+    
+    def _write_lines(self, lines: list):
+        """Write and flush encoded log lines (writer thread only)."""
+        if self._fh is None:
+            return
+        try:
+            if lines:
+                self._fh.write(b"".join(lines))
+            self._fh.flush()
+            if self._fh.tell() >= self.rotate_bytes:
+                self._rotate()
         except IOError:
             pass
     
     def add_log(self, transaction: Dict[str, Any], result: Dict[str, Any]):
         """Add a processed transaction log (thread-safe)."""
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": _now_iso(),
             "transaction_id": transaction.get("transaction", {}).get("transaction_id"),
             "amount": transaction.get("transaction", {}).get("amount"),
             "status": transaction.get("transaction", {}).get("status"),
-            "dqs_score": result.get("dqs_score", 0),
+            # Normalised up front so a bad score can neither fail halfway
+            # through the column appends below nor be written as null
+            "dqs_score": _log_score(result.get("dqs_score", 0)),
             "action": result.get("action", "UNKNOWN"),
             "flags": result.get("flags", []),
             "processing_time_ms": result.get("processing_time_ms", 0),
@@ -498,29 +1366,87 @@ class LiveLogStorage:
             "full_result": result
         }
         with self._lock:
+            # Never step back in time, even if the wall clock does
+            if self._timestamps and log_entry["timestamp"] < self._timestamps[-1]:
+                log_entry["timestamp"] = self._timestamps[-1]
             self.logs.append(log_entry)
-            # Save every 10 logs to reduce I/O
-            if len(self.logs) % 10 == 0:
-                self._save_logs()
+            self._timestamps.append(log_entry["timestamp"])
+            self._count_log(log_entry)
+            self._trim_logs()
+            # Enqueue under the lock so file order matches self.logs
+            self._write_q.put(log_entry)
     
     def get_logs(self, start_time: str = None, end_time: str = None) -> list:
-        """Get logs filtered by time range (thread-safe)."""
+        """
+        Get logs filtered by time range (thread-safe).
+        
+        Served from memory, except that a start_time older than the
+        in-memory window also pulls the matching older logs from disk.
+        """
         with self._lock:
-            if not start_time and not end_time:
-                return list(self.logs)  # Return a copy
-            
-            filtered = []
-            for log in self.logs:
-                log_time = log.get("timestamp", "")
-                
-                if start_time and log_time < start_time:
-                    continue
-                if end_time and log_time > end_time:
-                    continue
-                
-                filtered.append(log)
-            
-            return filtered
+            # Only the list reference and bounds are taken under the lock;
+            # the copy happens after release. The captured list is only
+            # ever appended to (trims and clears rebind self.logs), so its
+            # [lo:hi] slice stays valid while producers keep adding.
+            logs = self.logs
+            lo = bisect_left(self._timestamps, start_time) if start_time else 0
+            hi = bisect_right(self._timestamps, end_time) if end_time else len(logs)
+            oldest_in_memory = self._timestamps[0] if self._timestamps else None
+            needs_disk = (
+                self._has_disk_history and start_time
+                and (oldest_in_memory is None or start_time < oldest_in_memory)
+            )
+        
+        window = logs[lo:hi]
+        if needs_disk:
+            return self._read_disk_logs(start_time, end_time, oldest_in_memory) + window
+        return window
+    
+    def _read_disk_logs(self, start_time: str, end_time: Optional[str],
+                        before: Optional[str]) -> list:
+        """
+        Scan rotated and current log files for logs in [start_time, end_time]
+        that are older than `before` (the oldest in-memory timestamp).
+        
+        Files are walked line by line; lines are appended in timestamp
+        order, so the scan stops at the first line past the range.
+        """
+        found = []
+        for path in self._rotated_files() + [self.log_file]:
+            lines = self._iter_lines(path)
+            try:
+                for line in lines:
+                    match = _LINE_TIMESTAMP.match(line)
+                    if not match:
+                        continue
+                    timestamp = match.group(1).decode()
+                    if timestamp < start_time:
+                        continue
+                    if (end_time and timestamp > end_time) or (before and timestamp >= before):
+                        return found
+                    try:
+                        found.append(_loads(line))
+                    except ValueError:
+                        continue
+            except (IOError, ValueError, EOFError):
+                # File rotated, removed or truncated mid-scan; skip it
+                continue
+            finally:
+                lines.close()
+        return found
+    
+    @staticmethod
+    def _iter_lines(path: str):
+        """Yield the lines of a log file: gzip archives are streamed, plain files memory-mapped."""
+        if path.endswith(".gz"):
+            with gzip.open(path, 'rb') as f:
+                yield from f
+            return
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield from iter(mm.readline, b"")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get aggregate statistics (thread-safe)."""
@@ -535,30 +1461,46 @@ class LiveLogStorage:
                     "avg_dqs": 0,
                 }
             
-            safe = sum(1 for l in self.logs if l.get("action") == "SAFE_TO_USE")
-            review = sum(1 for l in self.logs if l.get("action") == "REVIEW_REQUIRED")
-            escalate = sum(1 for l in self.logs if l.get("action") == "ESCALATE")
-            rejected = sum(1 for l in self.logs if l.get("action") == "NO_ACTION")
-            
-            dqs_scores = [l.get("dqs_score", 100) for l in self.logs]
-            avg_dqs = sum(dqs_scores) / len(dqs_scores) if dqs_scores else 0
-            
             return {
                 "total": len(self.logs),
-                "safe": safe,
-                "review": review,
-                "escalate": escalate,
-                "rejected": rejected,
-                "avg_dqs": round(avg_dqs, 1),
+                "safe": self._action_counts[_ACTION_CODES["SAFE_TO_USE"]],
+                "review": self._action_counts[_ACTION_CODES["REVIEW_REQUIRED"]],
+                "escalate": self._action_counts[_ACTION_CODES["ESCALATE"]],
+                "rejected": self._action_counts[_ACTION_CODES["NO_ACTION"]],
+                "avg_dqs": round(self._dqs_sum / len(self.logs), 1),
             }
     
     def clear_logs(self):
-        """Clear all logs (thread-safe)."""
+        """Clear all logs and truncate the log file (thread-safe)."""
         with self._lock:
             self.logs = []
-            self._save_logs()
+            self._timestamps = []
+            self._has_disk_history = False
+            self._action_codes = array('b')
+            self._dqs_scores = array('d')
+            self._recount()
+            self._write_q.put(_CLEAR_FILE)
+        self.flush()
     
     def flush(self):
-        """Force save logs to disk (thread-safe)."""
-        with self._lock:
-            self._save_logs()
+        """Block until every log added so far has been written to disk (thread-safe)."""
+        if not self._writer_thread.is_alive():
+            return  # Closed; nothing will drain the queue
+        done = threading.Event()
+        self._write_q.put(done)
+        # Poll so a writer thread that died (or closed) cannot block us forever
+        while not done.wait(0.1):
+            if not self._writer_thread.is_alive():
+                return
+    
+    def close(self):
+        """
+        Write out queued logs, fsync the file and stop the writer thread.
+        
+        Regular writes only flush to the OS; this is the one point where
+        the log file is forced to stable storage. Call it on shutdown;
+        logs added afterwards are kept in memory only.
+        """
+        if self._writer_thread.is_alive():
+            self._write_q.put(_CLOSE_FILE)
+            self._writer_thread.join()
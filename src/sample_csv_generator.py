@@ -3,191 +3,274 @@ Sample CSV Generator
 
 Creates sample CSV files with varying quality levels for testing the DQS Engine.
 Generates files following the required VISA schema structure.
+
+Each file is generated column by column with NumPy and written in one go.
 """
-import csv
 import os
-import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+# Required VISA schema columns, shared by the high/medium/low quality files
+VISA_HEADERS = (
+    "transaction_id", "amount", "currency", "timestamp", "status",
+    "network", "card_type", "bin", "last4",
+    "merchant_id", "merchant_category_code", "country",
+    "customer_id", "email", "phone",
+    "risk_score", "risk_level",
+)
+
+# Completely different column names - tests the adapter's mapping ability
+POS_HEADERS = (
+    "TRANSACTION_ID", "CARD_ID", "AMOUNT", "TRANSACTION_TYPE",
+    "TIMESTAMP", "STORE_ID", "TERMINAL_ID", "REFERENCE_NUMBER",
+)
+
+# Choice pools, converted to arrays once instead of on every rng.choice call
+_HQ_NETWORKS = np.array(["VISA", "Mastercard", "RuPay"])
+_HQ_CARD_TYPES = np.array(["credit", "debit"])
+_HQ_MCCS = np.array(["5812", "5411", "5541", "5311"])
+
+_MQ_ISSUE_CURRENCIES = np.array(["INR", "USD", "EUR"])
+_MQ_ISSUE_STATUSES = np.array(["approved", "declined", "pending"])
+_MQ_ISSUE_NETWORKS = np.array(["VISA", "Mastercard", "RuPay", "UNKNOWN"])
+_MQ_NETWORKS = np.array(["VISA", "Mastercard"])
+_MQ_CARD_TYPES = np.array(["credit", "debit", "prepaid"])
+_MQ_ISSUE_MCCS = np.array(["5812", "5411", "0000"])
+_MQ_ISSUE_COUNTRIES = np.array(["IN", "US", "GB", "NG"])
+
+_LQ_CURRENCIES = np.array(["INR", "XXX", "???", "USD"])
+_LQ_STATUSES = np.array(["approved", "declined", "failed", "error"])
+_LQ_NETWORKS = np.array(["UNKNOWN", "VISA", "NONE", ""])
+_LQ_CARD_TYPES = np.array(["unknown", "credit", ""])
+_LQ_MCCS = np.array(["0000", "9999", ""])
+_LQ_COUNTRIES = np.array(["XX", "NG", "KP", ""])
+
+_POS_TRANSACTION_TYPES = np.array(["PURCHASE", "REFUND", "VOID"])
+
+# Rows per file from which generate_sample_csvs writes the files in parallel
+_PARALLEL_MIN_ROWS = 50_000
+
+# Formatted ID pools; rows index these with a draw instead of formatting per row
+_MERCHANT_IDS = np.array([f"MID_{n}" for n in range(1000, 10000)])
+_CUSTOMER_IDS = np.array([f"cust_{n}" for n in range(1000, 10000)])
+_STORE_IDS = np.array([f"STORE-{n:04d}" for n in range(100, 1000)])
+_TERMINAL_IDS = np.array([f"POS-{n}" for n in range(100, 1000)])
 
 
-def generate_sample_csvs(output_dir: str = "sample_data"):
-    """Generate sample CSV files with different quality levels."""
+def generate_sample_csvs(output_dir: str = "sample_data", seed: Optional[int] = None, count: int = 100,
+                         workers: Optional[int] = None):
+    """Generate sample CSV files with different quality levels.
+
+    Each file draws from its own generator spawned from `seed` (reproducible
+    when given), so the output is the same whether the files are written
+    inline or in parallel. `count` rows go into each file; raise it to
+    produce larger perf fixtures. From _PARALLEL_MIN_ROWS rows the files are
+    written by up to `workers` processes (default: one per CPU); below that,
+    or with workers=1, process start-up would cost more than it saves.
+    """
     os.makedirs(output_dir, exist_ok=True)
-    
-    # High quality (95%+ quality rate expected)
-    generate_high_quality_csv(os.path.join(output_dir, "high_quality_transactions.csv"), 100)
-    
-    # Medium quality (60-80% quality rate expected)
-    generate_medium_quality_csv(os.path.join(output_dir, "medium_quality_transactions.csv"), 100)
-    
-    # Low quality (30-50% quality rate expected)
-    generate_low_quality_csv(os.path.join(output_dir, "low_quality_transactions.csv"), 100)
-    
-    # Very low quality - non-standard format (for testing adapter)
-    generate_nonstandard_csv(os.path.join(output_dir, "nonstandard_pos_transactions.csv"), 100)
-    
+
+    jobs = [
+        # High quality (95%+ quality rate expected)
+        (generate_high_quality_csv, "high_quality_transactions.csv"),
+        # Medium quality (60-80% quality rate expected)
+        (generate_medium_quality_csv, "medium_quality_transactions.csv"),
+        # Low quality (30-50% quality rate expected)
+        (generate_low_quality_csv, "low_quality_transactions.csv"),
+        # Very low quality - non-standard format (for testing adapter)
+        (generate_nonstandard_csv, "nonstandard_pos_transactions.csv"),
+    ]
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    args = [
+        (generate, os.path.join(output_dir, filename), count, np.random.default_rng(child))
+        for (generate, filename), child in zip(jobs, seeds)
+    ]
+
+    workers = min(len(jobs), workers if workers is not None else (os.cpu_count() or 1))
+    if workers > 1 and count >= _PARALLEL_MIN_ROWS:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(*job) for job in args]
+            for future in futures:
+                future.result()
+    else:
+        for generate, *job_args in args:
+            generate(*job_args)
+
     print(f"Generated sample CSV files in {output_dir}/")
     return output_dir
 
 
-def generate_high_quality_csv(filepath: str, count: int):
+def _write_columns(filepath: str, headers: tuple, columns: dict):
+    """
+    Write equal-length columns as CSV rows with a single write.
+
+    A column is a sequence/array with one value per row or a constant string.
+    Constants are baked into a per-file row template, integer arrays are
+    formatted by %d and float arrays (amounts) by %.2f, so each row is one
+    `template % values` with no csv module quoting (generated values never
+    contain commas, quotes or newlines). The file is encoded once and
+    handed to one write() call.
+    """
+    fields = []
+    cells = []
+    for header in headers:
+        column = columns[header]
+        if isinstance(column, str):
+            fields.append(column.replace("%", "%%"))
+        elif isinstance(column, np.ndarray) and column.dtype.kind in "iuf":
+            fields.append("%.2f" if column.dtype.kind == "f" else "%d")
+            cells.append(column.tolist())
+        else:
+            fields.append("%s")
+            cells.append(column.tolist() if isinstance(column, np.ndarray) else column)
+    template = ",".join(fields)
+
+    lines = [",".join(headers)]
+    lines.extend(template % row for row in zip(*cells))
+    payload = ("\r\n".join(lines) + "\r\n").encode("utf-8")
+    with open(filepath, 'wb') as f:
+        f.write(payload)
+
+
+def _timestamp_pool(now: datetime, days: int, fmt: Optional[str] = None) -> np.ndarray:
+    """
+    Format `now` minus 0..days-1 days once each.
+
+    Rows only differ by a whole-day offset, so indexing this pool with the
+    drawn offsets replaces a datetime subtraction and format per row.
+    """
+    stamps = [now - timedelta(days=d) for d in range(days)]
+    return np.array([t.strftime(fmt) if fmt else t.isoformat() for t in stamps])
+
+
+def generate_high_quality_csv(filepath: str, count: int, rng: Optional[np.random.Generator] = None):
     """Generate high-quality transactions with minimal anomalies."""
-    headers = [
-        "transaction_id", "amount", "currency", "timestamp", "status",
-        "network", "card_type", "bin", "last4",
-        "merchant_id", "merchant_category_code", "country",
-        "customer_id", "email", "phone",
-        "risk_score", "risk_level"
-    ]
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        
-        for i in range(count):
-            base_time = datetime.now() - timedelta(days=random.randint(0, 30))
-            amount = round(random.uniform(500, 15000), 2)
-            
-            row = {
-                "transaction_id": f"txn_{i:08d}",
-                "amount": amount,
-                "currency": "INR",
-                "timestamp": base_time.isoformat(),
-                "status": "approved",
-                "network": random.choice(["VISA", "Mastercard", "RuPay"]),
-                "card_type": random.choice(["credit", "debit"]),
-                "bin": str(random.randint(400000, 499999)),
-                "last4": str(random.randint(1000, 9999)),
-                "merchant_id": f"MID_{random.randint(1000, 9999)}",
-                "merchant_category_code": random.choice(["5812", "5411", "5541", "5311"]),
-                "country": "IN",
-                "customer_id": f"cust_{random.randint(1000, 9999)}",
-                "email": f"user{i}@example.com",
-                "phone": f"+91{random.randint(7000000000, 9999999999)}",
-                "risk_score": random.randint(5, 30),
-                "risk_level": "low"
-            }
-            writer.writerow(row)
-    
+    rng = rng if rng is not None else np.random.default_rng()
+    now = datetime.now()
+    rows = range(count)
+
+    columns = {
+        "transaction_id": [f"txn_{i:08d}" for i in rows],
+        "amount": rng.uniform(500, 15000, count),
+        "currency": "INR",
+        "timestamp": _timestamp_pool(now, 31)[rng.integers(0, 31, count)],
+        "status": "approved",
+        "network": rng.choice(_HQ_NETWORKS, count),
+        "card_type": rng.choice(_HQ_CARD_TYPES, count),
+        "bin": rng.integers(400000, 500000, count),
+        "last4": rng.integers(1000, 10000, count),
+        "merchant_id": _MERCHANT_IDS[rng.integers(0, 9000, count)],
+        "merchant_category_code": rng.choice(_HQ_MCCS, count),
+        "country": "IN",
+        "customer_id": _CUSTOMER_IDS[rng.integers(0, 9000, count)],
+        "email": [f"user{i}@example.com" for i in rows],
+        "phone": [f"+91{n}" for n in rng.integers(7000000000, 10000000000, count).tolist()],
+        "risk_score": rng.integers(5, 31, count),
+        "risk_level": "low",
+    }
+    _write_columns(filepath, VISA_HEADERS, columns)
+
     print(f"  Created: {filepath} ({count} records, ~95% quality)")
 
 
-def generate_medium_quality_csv(filepath: str, count: int):
+def generate_medium_quality_csv(filepath: str, count: int, rng: Optional[np.random.Generator] = None):
     """Generate medium-quality transactions with some issues."""
-    headers = [
-        "transaction_id", "amount", "currency", "timestamp", "status",
-        "network", "card_type", "bin", "last4",
-        "merchant_id", "merchant_category_code", "country",
-        "customer_id", "email", "phone",
-        "risk_score", "risk_level"
-    ]
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        
-        for i in range(count):
-            base_time = datetime.now() - timedelta(days=random.randint(0, 60))
-            is_issue = i % 4 == 0  # 25% with issues
-            
-            amount = round(random.uniform(100000, 500000) if is_issue else random.uniform(500, 20000), 2)
-            
-            row = {
-                "transaction_id": f"txn_{i:08d}",
-                "amount": amount,
-                "currency": "INR" if not is_issue else random.choice(["INR", "USD", "EUR"]),
-                "timestamp": base_time.isoformat(),
-                "status": "approved" if not is_issue else random.choice(["approved", "declined", "pending"]),
-                "network": random.choice(["VISA", "Mastercard", "RuPay", "UNKNOWN"]) if is_issue else random.choice(["VISA", "Mastercard"]),
-                "card_type": random.choice(["credit", "debit", "prepaid"]),
-                "bin": str(random.randint(400000, 499999)),
-                "last4": str(random.randint(1000, 9999)),
-                "merchant_id": f"MID_{random.randint(1000, 9999)}",
-                "merchant_category_code": random.choice(["5812", "5411", "0000"]) if is_issue else "5812",
-                "country": random.choice(["IN", "US", "GB", "NG"]) if is_issue else "IN",
-                "customer_id": f"cust_{random.randint(1000, 9999)}",
-                "email": f"user{i}@example.com" if not is_issue else "",
-                "phone": f"+91{random.randint(7000000000, 9999999999)}" if not is_issue else "",
-                "risk_score": random.randint(40, 80) if is_issue else random.randint(10, 40),
-                "risk_level": "high" if is_issue else "low"
-            }
-            writer.writerow(row)
-    
+    rng = rng if rng is not None else np.random.default_rng()
+    now = datetime.now()
+    rows = range(count)
+    is_issue = np.arange(count) % 4 == 0  # 25% with issues
+
+    amount = np.where(is_issue, rng.uniform(100000, 500000, count), rng.uniform(500, 20000, count))
+
+    columns = {
+        "transaction_id": [f"txn_{i:08d}" for i in rows],
+        "amount": amount,
+        "currency": np.where(is_issue, rng.choice(_MQ_ISSUE_CURRENCIES, count), "INR"),
+        "timestamp": _timestamp_pool(now, 61)[rng.integers(0, 61, count)],
+        "status": np.where(is_issue, rng.choice(_MQ_ISSUE_STATUSES, count), "approved"),
+        "network": np.where(
+            is_issue,
+            rng.choice(_MQ_ISSUE_NETWORKS, count),
+            rng.choice(_MQ_NETWORKS, count)
+        ),
+        "card_type": rng.choice(_MQ_CARD_TYPES, count),
+        "bin": rng.integers(400000, 500000, count),
+        "last4": rng.integers(1000, 10000, count),
+        "merchant_id": _MERCHANT_IDS[rng.integers(0, 9000, count)],
+        "merchant_category_code": np.where(is_issue, rng.choice(_MQ_ISSUE_MCCS, count), "5812"),
+        "country": np.where(is_issue, rng.choice(_MQ_ISSUE_COUNTRIES, count), "IN"),
+        "customer_id": _CUSTOMER_IDS[rng.integers(0, 9000, count)],
+        "email": np.where(is_issue, "", [f"user{i}@example.com" for i in rows]),
+        "phone": np.where(
+            is_issue, "", [f"+91{n}" for n in rng.integers(7000000000, 10000000000, count).tolist()]
+        ),
+        "risk_score": np.where(is_issue, rng.integers(40, 81, count), rng.integers(10, 41, count)),
+        "risk_level": np.where(is_issue, "high", "low"),
+    }
+    _write_columns(filepath, VISA_HEADERS, columns)
+
     print(f"  Created: {filepath} ({count} records, ~65% quality)")
 
 
-def generate_low_quality_csv(filepath: str, count: int):
+def generate_low_quality_csv(filepath: str, count: int, rng: Optional[np.random.Generator] = None):
     """Generate low-quality transactions with many anomalies."""
-    headers = [
-        "transaction_id", "amount", "currency", "timestamp", "status",
-        "network", "card_type", "bin", "last4",
-        "merchant_id", "merchant_category_code", "country",
-        "customer_id", "email", "phone",
-        "risk_score", "risk_level"
-    ]
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        
-        for i in range(count):
-            base_time = datetime.now() - timedelta(days=random.randint(0, 90))
-            is_critical = i % 2 == 0  # 50% with critical issues
-            
-            # Intentionally create problematic data
-            amount = round(random.uniform(500000, 2000000) if is_critical else random.uniform(500, 10000), 2)
-            
-            row = {
-                "transaction_id": f"txn_{i:08d}",
-                "amount": amount,
-                "currency": random.choice(["INR", "XXX", "???", "USD"]),
-                "timestamp": base_time.isoformat() if not is_critical else "invalid_date",
-                "status": random.choice(["approved", "declined", "failed", "error"]),
-                "network": random.choice(["UNKNOWN", "VISA", "NONE", ""]),
-                "card_type": random.choice(["unknown", "credit", ""]),
-                "bin": str(random.randint(400000, 499999)) if not is_critical else "000000",
-                "last4": str(random.randint(1000, 9999)) if not is_critical else "0000",
-                "merchant_id": f"MID_{random.randint(1000, 9999)}" if not is_critical else "",
-                "merchant_category_code": random.choice(["0000", "9999", ""]),
-                "country": random.choice(["XX", "NG", "KP", ""]),
-                "customer_id": f"cust_{random.randint(1000, 9999)}" if not is_critical else "",
-                "email": "",
-                "phone": "",
-                "risk_score": random.randint(70, 100),
-                "risk_level": "high"
-            }
-            writer.writerow(row)
-    
+    rng = rng if rng is not None else np.random.default_rng()
+    now = datetime.now()
+    is_critical = np.arange(count) % 2 == 0  # 50% with critical issues
+
+    # Intentionally create problematic data
+    amount = np.where(is_critical, rng.uniform(500000, 2000000, count), rng.uniform(500, 10000, count))
+    timestamps = _timestamp_pool(now, 91)[rng.integers(0, 91, count)]
+
+    columns = {
+        "transaction_id": [f"txn_{i:08d}" for i in range(count)],
+        "amount": amount,
+        "currency": rng.choice(_LQ_CURRENCIES, count),
+        "timestamp": np.where(is_critical, "invalid_date", timestamps),
+        "status": rng.choice(_LQ_STATUSES, count),
+        "network": rng.choice(_LQ_NETWORKS, count),
+        "card_type": rng.choice(_LQ_CARD_TYPES, count),
+        "bin": np.where(is_critical, "000000", rng.integers(400000, 500000, count).astype(str)),
+        "last4": np.where(is_critical, "0000", rng.integers(1000, 10000, count).astype(str)),
+        "merchant_id": np.where(is_critical, "", _MERCHANT_IDS[rng.integers(0, 9000, count)]),
+        "merchant_category_code": rng.choice(_LQ_MCCS, count),
+        "country": rng.choice(_LQ_COUNTRIES, count),
+        "customer_id": np.where(is_critical, "", _CUSTOMER_IDS[rng.integers(0, 9000, count)]),
+        "email": "",
+        "phone": "",
+        "risk_score": rng.integers(70, 101, count),
+        "risk_level": "high",
+    }
+    _write_columns(filepath, VISA_HEADERS, columns)
+
     print(f"  Created: {filepath} ({count} records, ~35% quality)")
 
 
-def generate_nonstandard_csv(filepath: str, count: int):
+def generate_nonstandard_csv(filepath: str, count: int, rng: Optional[np.random.Generator] = None):
     """Generate non-standard format CSV (POS-style) to test adapter."""
-    # Completely different column names - tests the adapter's mapping ability
-    headers = [
-        "TRANSACTION_ID", "CARD_ID", "AMOUNT", "TRANSACTION_TYPE", 
-        "TIMESTAMP", "STORE_ID", "TERMINAL_ID", "REFERENCE_NUMBER"
-    ]
-    
-    with open(filepath, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        
-        for i in range(count):
-            base_time = datetime.now() - timedelta(days=random.randint(0, 30))
-            
-            row = {
-                "TRANSACTION_ID": f"TX-POS-{base_time.strftime('%Y%m%d%H%M%S')}-{i:05d}",
-                "CARD_ID": f"GC-STORE-{random.randint(1000, 9999):04d}-{random.randint(1000, 9999)}",
-                "AMOUNT": round(random.uniform(100, 50000), 2),
-                "TRANSACTION_TYPE": random.choice(["PURCHASE", "REFUND", "VOID"]),
-                "TIMESTAMP": base_time.strftime("%Y-%m-%d %H:%M:%S"),
-                "STORE_ID": f"STORE-{random.randint(100, 999):04d}",
-                "TERMINAL_ID": f"POS-{random.randint(100, 999)}",
-                "REFERENCE_NUMBER": f"REF-{random.randint(100000, 999999)}"
-            }
-            writer.writerow(row)
-    
+    rng = rng if rng is not None else np.random.default_rng()
+    now = datetime.now()
+    days = rng.integers(0, 31, count)
+    id_stamps = _timestamp_pool(now, 31, "%Y%m%d%H%M%S")[days].tolist()
+
+    columns = {
+        "TRANSACTION_ID": [f"TX-POS-{stamp}-{i:05d}" for i, stamp in enumerate(id_stamps)],
+        "CARD_ID": [
+            f"GC-STORE-{a:04d}-{b}"
+            for a, b in zip(rng.integers(1000, 10000, count).tolist(), rng.integers(1000, 10000, count).tolist())
+        ],
+        "AMOUNT": rng.uniform(100, 50000, count),
+        "TRANSACTION_TYPE": rng.choice(_POS_TRANSACTION_TYPES, count),
+        "TIMESTAMP": _timestamp_pool(now, 31, "%Y-%m-%d %H:%M:%S")[days],
+        "STORE_ID": _STORE_IDS[rng.integers(0, 900, count)],
+        "TERMINAL_ID": _TERMINAL_IDS[rng.integers(0, 900, count)],
+        "REFERENCE_NUMBER": [f"REF-{n}" for n in rng.integers(100000, 1000000, count).tolist()],
+    }
+    _write_columns(filepath, POS_HEADERS, columns)
+
     print(f"  Created: {filepath} ({count} records, non-standard format)")
 
 
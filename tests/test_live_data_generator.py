@@ -0,0 +1,351 @@
+"""
+Live Data Generator Tests
+
+Tests for LiveDataGenerator and LiveLogStorage.
+"""
+import pytest
+import os
+import sys
+import json
+import glob
+import re
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src import live_data_generator
+from src.live_data_generator import (
+    LiveDataGenerator, LiveLogStorage, _derive_numeric_columns, _flatten_complete, _flatten_tolerant
+)
+
+
+SAFE_RESULT = {"action": "SAFE_TO_USE", "dqs_score": 90.0}
+REVIEW_RESULT = {"action": "REVIEW_REQUIRED", "dqs_score": 60.0}
+
+
+@pytest.fixture
+def generator():
+    return LiveDataGenerator()
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "live_stream_logs.jsonl")
+
+
+def add_logs(storage, generator, count, result=SAFE_RESULT):
+    for _ in range(count):
+        storage.add_log(generator.generate_transaction(), result)
+
+
+def count_batch_issues(generator, batch):
+    """Count the injected data quality issues in each row of a batch."""
+    year_ago = (datetime.utcnow() - timedelta(days=365)).isoformat()
+    return (
+        np.isin(batch["txn_status"], generator._bad_statuses).astype(int)
+        + np.isin(batch["card_network"], generator._bad_networks)
+        + (batch["txn_timestamp"].astype(str) < year_ago)
+        + (batch["txn_amount"].astype(np.int64) >= 15000000)
+        + np.isin(batch["merchant_merchant_category_code"], generator._bad_mccs)
+    )
+
+
+class TestLiveLogStorage:
+    """Persistence tests for LiveLogStorage."""
+
+    def test_round_trip_reload(self, log_path, generator):
+        """Test that logs and stats survive a close and reopen."""
+        storage = LiveLogStorage(log_path)
+        add_logs(storage, generator, 30)
+        add_logs(storage, generator, 10, REVIEW_RESULT)
+        storage.close()
+
+        reopened = LiveLogStorage(log_path)
+        stats = reopened.get_stats()
+        assert stats["total"] == 40
+        assert stats["safe"] == 30
+        assert stats["review"] == 10
+        assert stats["avg_dqs"] == 82.5
+        assert [log["transaction_id"] for log in reopened.get_logs()] == \
+            [log["transaction_id"] for log in storage.get_logs()]
+        reopened.close()
+
+    def test_file_is_json_lines(self, log_path, generator):
+        """Test that every line on disk is one JSON object."""
+        storage = LiveLogStorage(log_path)
+        add_logs(storage, generator, 5)
+        storage.flush()
+
+        with open(log_path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 5
+        assert all(isinstance(json.loads(line), dict) for line in lines)
+        storage.close()
+
+    def test_trim_keeps_recent_in_memory(self, log_path, generator):
+        """Test that memory holds at most max_in_memory logs and disk keeps the rest."""
+        storage = LiveLogStorage(log_path, max_in_memory=50)
+        add_logs(storage, generator, 120)
+        storage.flush()
+
+        assert len(storage.get_logs()) <= 50
+        assert len(storage.get_logs(start_time="2000-01-01")) == 120
+        storage.close()
+
+    def test_reload_after_rotation(self, log_path, generator):
+        """Test that a restart refills memory from rotated archives."""
+        storage = LiveLogStorage(log_path, max_in_memory=1000, rotate_mb=0.2)
+        add_logs(storage, generator, 500)
+        storage.close()
+        assert glob.glob(log_path[:-len(".jsonl")] + ".*.jsonl.gz")
+
+        reopened = LiveLogStorage(log_path, max_in_memory=1000, rotate_mb=0.2)
+        assert reopened.get_stats()["total"] == 500
+        assert len(reopened.get_logs()) == 500
+        timestamps = [log["timestamp"] for log in reopened.get_logs()]
+        assert timestamps == sorted(timestamps)
+        reopened.close()
+
+    def test_clear_then_rotation(self, log_path, generator):
+        """Test that rotation after clear_logs counts from the empty file."""
+        storage = LiveLogStorage(log_path, rotate_mb=0.5)
+        add_logs(storage, generator, 200)
+        storage.flush()
+        storage.clear_logs()
+        assert storage._fh.tell() == 0
+
+        add_logs(storage, generator, 100)
+        storage.flush()
+        assert os.path.getsize(log_path) < storage.rotate_bytes
+        assert not glob.glob(log_path[:-len(".jsonl")] + ".*.jsonl*")
+        assert storage.get_stats()["total"] == 100
+        storage.close()
+
+    def test_flush_after_unserializable_entry(self, log_path, generator):
+        """Test that an entry orjson rejects neither kills the writer nor hangs flush()."""
+        storage = LiveLogStorage(log_path)
+        bad = generator.generate_transaction()
+        bad["extra"] = 1 << 70  # Wider than 64 bits
+        storage.add_log(bad, SAFE_RESULT)
+        add_logs(storage, generator, 3)
+
+        flusher = threading.Thread(target=storage.flush, daemon=True)
+        flusher.start()
+        flusher.join(timeout=10)
+        assert not flusher.is_alive()
+
+        add_logs(storage, generator, 2)
+        storage.close()
+        with open(log_path) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 6
+        assert json.loads(lines[0])["full_transaction"]["extra"] == 1 << 70
+
+    def test_flush_after_close_returns(self, log_path, generator):
+        """Test that flush() does not block once the writer has stopped."""
+        storage = LiveLogStorage(log_path)
+        add_logs(storage, generator, 2)
+        storage.close()
+        storage.flush()
+
+    def test_skips_non_object_lines(self, log_path):
+        """Test that a file in the old indented-array format does not break start-up."""
+        with open(log_path, "w") as f:
+            json.dump([{"timestamp": "2024-01-01T00:00:00Z", "flags": ["Missing email"]}], f, indent=2)
+
+        storage = LiveLogStorage(log_path)
+        assert storage.get_stats()["total"] == 0
+        storage.close()
+
+    def test_timestamps_never_go_backwards(self, log_path, generator, monkeypatch):
+        """Test that add_log clamps a clock that steps back."""
+        transactions = [generator.generate_transaction() for _ in range(3)]
+        stamps = iter(["2024-01-01T00:00:02Z", "2024-01-01T00:00:01Z", "2024-01-01T00:00:03Z"])
+        monkeypatch.setattr(live_data_generator, "_now_iso", lambda seconds_ago=0: next(stamps))
+        storage = LiveLogStorage(log_path)
+        for transaction in transactions:
+            storage.add_log(transaction, SAFE_RESULT)
+
+        assert [log["timestamp"] for log in storage.get_logs()] == [
+            "2024-01-01T00:00:02Z", "2024-01-01T00:00:02Z", "2024-01-01T00:00:03Z"
+        ]
+        assert len(storage.get_logs(start_time="2024-01-01T00:00:03Z")) == 1
+        storage.close()
+
+    def test_unopenable_log_file(self, tmp_path, generator):
+        """Test that a log file that cannot be opened leaves storage usable in memory."""
+        storage = LiveLogStorage(str(tmp_path / "missing" / "live_stream_logs.jsonl"))
+        assert storage.last_write_error
+        add_logs(storage, generator, 3)
+        storage.flush()
+        storage.clear_logs()
+        add_logs(storage, generator, 2)
+
+        assert storage.get_stats()["total"] == 2
+        storage.close()
+
+    def test_non_numeric_scores(self, log_path, generator):
+        """Test that NaN, null and string scores neither break add_log nor a reload."""
+        storage = LiveLogStorage(log_path)
+        storage.add_log(generator.generate_transaction(), {"action": "SAFE_TO_USE", "dqs_score": float("nan")})
+        storage.add_log(generator.generate_transaction(), {"action": "SAFE_TO_USE", "dqs_score": "high"})
+        add_logs(storage, generator, 1)
+        storage.close()
+        with open(log_path, "a") as f:
+            f.write(json.dumps({"timestamp": "2999-01-01T00:00:00Z", "action": "SAFE_TO_USE", "dqs_score": None}) + "\n")
+
+        assert len(storage.logs) == len(storage._timestamps) == len(storage._dqs_scores) == 3
+        reopened = LiveLogStorage(log_path)
+        stats = reopened.get_stats()
+        assert stats["total"] == 4
+        assert stats["avg_dqs"] == 97.5
+        reopened.close()
+
+
+class TestLiveDataGenerator:
+    """Generation and flattening tests for LiveDataGenerator."""
+
+    def test_generate_stream_count(self):
+        """Test that generate_stream returns n transactions with unique IDs across workers."""
+        generator = LiveDataGenerator(workers=3)
+        transactions = generator.generate_stream(50)
+
+        assert len(transactions) == 50
+        ids = {txn["transaction"]["transaction_id"] for txn in transactions}
+        assert len(ids) == 50
+
+    def test_batch_keys_match_flatten(self, generator):
+        """Test that generate_batch columns match flatten_for_dqs keys, in order."""
+        batch = generator.generate_batch(20)
+        flat = generator.flatten_for_dqs(generator.generate_transaction())
+
+        assert list(batch.keys()) == list(flat.keys())
+        assert all(len(column) == 20 for column in batch.values())
+
+    def test_batch_frame(self, generator):
+        """Test that generate_batch_frame returns one row per transaction."""
+        frame = generator.generate_batch_frame(25)
+
+        assert frame.shape == (25, len(generator.generate_batch(1)))
+        assert frame["txn_currency"].eq("INR").all()
+
+    def test_generated_flattener_matches_tolerant(self, generator):
+        """Test that the generated flattener agrees with the tolerant fallback."""
+        for _ in range(50):
+            transaction = generator.generate_transaction()
+            assert _flatten_complete(transaction) == _flatten_tolerant(transaction)
+
+    def test_flatten_missing_section(self, generator):
+        """Test that a missing section flattens to defaults instead of raising."""
+        transaction = generator.generate_transaction()
+        del transaction["card"]
+        flat = generator.flatten_for_dqs(transaction)
+
+        assert flat["card_network"] == ""
+        assert flat["txn_transaction_id"] == transaction["transaction"]["transaction_id"]
+
+    def test_sca_applied_keeps_explicit_value(self, generator):
+        """Test that compliance_sca_applied only defaults when the field is missing."""
+        transaction = generator.generate_transaction()
+        transaction["compliance"]["sca_applied"] = None
+        assert generator.flatten_for_dqs(transaction)["compliance_sca_applied"] is None
+
+        del transaction["compliance"]["sca_applied"]
+        assert generator.flatten_for_dqs(transaction)["compliance_sca_applied"] is False
+
+    def test_numeric_blocks_per_instance(self):
+        """Test that generators with different rates keep their own prefetched rows."""
+        low = LiveDataGenerator(anomaly_rate=0.1)
+        high = LiveDataGenerator(anomaly_rate=0.5)
+        low.generate_transaction()
+        high.generate_transaction()
+        remaining = len(low._numeric_blocks.rows)
+
+        high.generate_transaction()
+        low.generate_transaction()
+        assert len(low._numeric_blocks.rows) == remaining - 1
+
+    def test_api_responses_are_cached(self, generator, monkeypatch):
+        """Test that API responses are reused within cache_ttl."""
+        calls = []
+
+        class FakeResponse:
+            status_code = 200
+
+            def json(self):
+                return {"transaction_id": "ext_1", "amount": 100}
+
+        def fake_get(url, headers=None, timeout=None):
+            calls.append(url)
+            return FakeResponse()
+
+        if generator._session is None:
+            pytest.skip("requests is not installed")
+        monkeypatch.setattr(generator._session, "get", fake_get)
+        generator.set_api_url("http://example.invalid/txn")
+        generator.cache_ttl = 60
+
+        first = generator.generate_transaction()
+        second = generator.generate_transaction()
+        assert len(calls) == 1
+        assert first["_metadata"]["source"] == "external_api"
+        assert second["transaction"]["transaction_id"] == "ext_1"
+
+        generator.cache_ttl = 0
+        generator.generate_transaction()
+        assert len(calls) == 2
+
+    def test_read_timeouts_not_retried(self, generator):
+        """Test that the API session retries connection errors but not read timeouts."""
+        if generator._session is None:
+            pytest.skip("requests is not installed")
+        retry = generator._session.get_adapter("https://example.invalid").max_retries
+        assert retry.total == 3
+        assert retry.read == 0
+
+    def test_batch_timestamps_keep_microseconds(self, monkeypatch):
+        """Test that batch timestamps keep six microsecond digits even when they are zero."""
+        class WholeSecond(datetime):
+            @classmethod
+            def utcnow(cls):
+                return datetime(2024, 1, 1, 12, 0, 0)
+
+        monkeypatch.setattr(live_data_generator, "datetime", WholeSecond)
+        batch = LiveDataGenerator(anomaly_rate=1.0).generate_batch(50)
+
+        pattern = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{6}Z")
+        assert all(pattern.fullmatch(ts) for ts in batch["txn_timestamp"])
+
+    def test_batch_anomalies_get_two_or_three_issues(self):
+        """Test that every anomalous batch row gets 2-3 distinct issues and normal rows none."""
+        anomalous = LiveDataGenerator(anomaly_rate=1.0)
+        anomalous._np_rng = np.random.default_rng(16)
+        issues = count_batch_issues(anomalous, anomalous.generate_batch(2000))
+        assert set(np.unique(issues)) == {2, 3}
+
+        normal = LiveDataGenerator(anomaly_rate=0.0)
+        normal._np_rng = np.random.default_rng(16)
+        assert not count_batch_issues(normal, normal.generate_batch(2000)).any()
+
+    def test_numeric_flag_rates(self):
+        """Test that each 16-bit flag lane fires at its own rate, independently, for anomalies only."""
+        rng = np.random.default_rng(22)
+        anomalies = _derive_numeric_columns(rng, np.ones(200_000, dtype=bool))
+        high_value = anomalies["amount"] >= 50000
+        declined = anomalies["status"] != "approved"
+        rates = [
+            high_value.mean(), declined.mean(), anomalies["foreign"].mean(),
+            (anomalies["velocity_check"] == "fail").mean(), (anomalies["geo_check"] == "fail").mean(),
+        ]
+        assert np.allclose(rates, [0.5, 0.3, 0.4, 0.4, 0.3], atol=0.01)
+        assert abs((high_value & declined).mean() - 0.15) < 0.01
+
+        normal = _derive_numeric_columns(rng, np.zeros(10_000, dtype=bool))
+        assert (normal["amount"] <= 20000).all()
+        assert (normal["status"] == "approved").all()
+        assert not normal["foreign"].any()
+        assert (normal["velocity_check"] == "pass").all()
+        assert (normal["geo_check"] == "pass").all()
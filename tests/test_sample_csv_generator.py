@@ -0,0 +1,96 @@
+"""
+Sample CSV Generator Tests
+
+Tests for the sample CSV files used to exercise the DQS Engine.
+"""
+import pytest
+import os
+import sys
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src import sample_csv_generator
+from src.sample_csv_generator import generate_sample_csvs, VISA_HEADERS, POS_HEADERS
+
+
+FILES = {
+    "high_quality_transactions.csv": VISA_HEADERS,
+    "medium_quality_transactions.csv": VISA_HEADERS,
+    "low_quality_transactions.csv": VISA_HEADERS,
+    "nonstandard_pos_transactions.csv": POS_HEADERS,
+}
+
+# Columns derived from the wall clock, which differs between runs
+CLOCK_COLUMNS = ["timestamp", "TRANSACTION_ID", "TIMESTAMP"]
+
+
+def read_csv(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def without_clock(frame):
+    return frame.drop(columns=[c for c in CLOCK_COLUMNS if c in frame.columns])
+
+
+class TestSampleCsvGenerator:
+    """Tests for generate_sample_csvs."""
+
+    def test_files_and_headers(self, tmp_path):
+        """Test that all four files are written with their headers and row count."""
+        generate_sample_csvs(str(tmp_path), seed=1, count=40)
+
+        for filename, headers in FILES.items():
+            frame = read_csv(tmp_path / filename)
+            assert tuple(frame.columns) == headers
+            assert len(frame) == 40
+
+    def test_seeded_runs_are_reproducible(self, tmp_path):
+        """Test that the same seed gives the same data and another seed does not."""
+        generate_sample_csvs(str(tmp_path / "a"), seed=7)
+        generate_sample_csvs(str(tmp_path / "b"), seed=7)
+        generate_sample_csvs(str(tmp_path / "c"), seed=8)
+
+        for filename in FILES:
+            a = without_clock(read_csv(tmp_path / "a" / filename))
+            b = without_clock(read_csv(tmp_path / "b" / filename))
+            c = without_clock(read_csv(tmp_path / "c" / filename))
+            pd.testing.assert_frame_equal(a, b)
+            assert not a.equals(c)
+
+    def test_parallel_matches_inline(self, tmp_path, monkeypatch):
+        """Test that the process pool path writes the same data as the inline path."""
+        monkeypatch.setattr(sample_csv_generator, "_PARALLEL_MIN_ROWS", 1)
+        generate_sample_csvs(str(tmp_path / "inline"), seed=3, count=30, workers=1)
+        generate_sample_csvs(str(tmp_path / "pool"), seed=3, count=30, workers=2)
+
+        for filename in FILES:
+            pd.testing.assert_frame_equal(
+                without_clock(read_csv(tmp_path / "inline" / filename)),
+                without_clock(read_csv(tmp_path / "pool" / filename)),
+            )
+
+    def test_amounts_have_two_decimals(self, tmp_path):
+        """Test that amounts are always written with exactly two decimals."""
+        generate_sample_csvs(str(tmp_path), seed=2)
+
+        amounts = read_csv(tmp_path / "high_quality_transactions.csv")["amount"]
+        assert amounts.str.fullmatch(r"\d+\.\d{2}").all()
+        pos_amounts = read_csv(tmp_path / "nonstandard_pos_transactions.csv")["AMOUNT"]
+        assert pos_amounts.str.fullmatch(r"\d+\.\d{2}").all()
+
+    def test_quality_levels(self, tmp_path):
+        """Test that the issue rows land where each quality level expects them."""
+        generate_sample_csvs(str(tmp_path))
+
+        high = read_csv(tmp_path / "high_quality_transactions.csv")
+        assert (high["status"] == "approved").all()
+        assert high["email"].ne("").all()
+
+        medium = read_csv(tmp_path / "medium_quality_transactions.csv")
+        assert (medium["email"] == "").sum() == 25  # Every 4th row
+
+        low = read_csv(tmp_path / "low_quality_transactions.csv")
+        assert (low["timestamp"] == "invalid_date").sum() == 50  # Every 2nd row
+        assert (low["bin"].iloc[::2] == "000000").all()